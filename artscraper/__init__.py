@@ -5,7 +5,21 @@ from artscraper.googleart import GoogleArtScraper
 from artscraper.wikiart import WikiArtScraper
 from artscraper.find_artworks import FindArtworks
 from artscraper.find_artists import get_artist_links
+from artscraper.session import SessionPool
+from artscraper.cache import LRUCache, SQLiteCache, PaintingIndex
+from artscraper.ratelimit import TokenBucket, AdaptiveRateLimiter
+from artscraper.async_wikiart import AsyncWikiArtScraper
+from artscraper.browser import BrowserProfile
+from artscraper.pipeline import run_pipeline
+from artscraper.wikimedia import WikidataResolver, WikipediaExtracts
+from artscraper.retrying import RetryPolicy, RetryBudget, RetryResult
 
 __all__ = ["GoogleArtScraper", "WikiArtScraper",
            "FindArtworks", "get_artist_links",
-           "random_wait_time"]
+           "random_wait_time", "SessionPool", "TokenBucket",
+           "AdaptiveRateLimiter",
+           "AsyncWikiArtScraper", "LRUCache",
+           "SQLiteCache", "PaintingIndex", "BrowserProfile",
+           "run_pipeline", "WikidataResolver",
+           "WikipediaExtracts", "RetryPolicy", "RetryBudget",
+           "RetryResult"]
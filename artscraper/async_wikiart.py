@@ -0,0 +1,453 @@
+"""Module for the asynchronous WikiArt scraper class."""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+from artscraper.ratelimit import AdaptiveRateLimiter
+from artscraper.ratelimit import parse_retry_after
+from artscraper.session import PartialDownload
+from artscraper.wikiart_common import is_painting
+from artscraper.wikiart_common import page_missing
+from artscraper.wikiart_common import read_api_keys
+from artscraper.wikiart_common import PaintingIdScanner
+from artscraper.wikiart_common import search_terms
+from artscraper.wikiart_common import split_artwork_link
+
+API_URL = "https://www.wikiart.org/en/api/2"
+
+
+class AsyncWikiArtScraper:  # pylint: disable=too-many-instance-attributes
+    """Asynchronous client for the WikiArt API.
+
+    Mirrors the WikiArtScraper, but every method takes the link as an
+    argument, so that many links can be processed at the same time. All
+    requests share one adaptive rate limiter, which keeps the total number
+    of requests per second to each host within the same budget as the
+    WikiArtScraper, and slows down if the server has trouble keeping up.
+    This needs the optional `httpx` package (pip install artscraper[async]).
+
+    Parameters
+    ----------
+    output_dir: Path or str, optional
+        Output directory for any scraped images.
+    skip_existing: bool, default=True
+        If true, skip downloading any existing images.
+    min_wait: float, default=0.3
+        Minimum average time between two API requests in seconds.
+    timeout: float, default=150
+        Timeout for requests in seconds.
+    max_concurrency: int, default=100
+        Maximum number of links that are in flight at the same time.
+    rate_limiter: AdaptiveRateLimiter or TokenBucket, optional
+        Rate limiter to use instead of the adaptive one derived from
+        min_wait, for instance to share the budget with other scrapers.
+    http2: bool, default=False
+        Use HTTP/2 (needs pip install artscraper[http2]).
+
+    Examples
+    --------
+    >>> async with AsyncWikiArtScraper("data/wikiart") as scraper:
+    ...     await scraper.scrape_many(links)
+    """
+
+    #: Maximum number of bytes of an artwork page to scan for the painting ID.
+    max_scrape_bytes = 2**20
+
+    #: Maximum number of times to resume an interrupted image download.
+    max_resumes = 3
+
+    # pylint: disable-msg=too-many-arguments
+    def __init__(self, output_dir=None, skip_existing=True, min_wait=0.3,
+                 timeout=150, *, max_concurrency=100, rate_limiter=None,
+                 http2=False):
+        try:
+            import httpx  # pylint: disable=import-outside-toplevel
+        except ImportError as error:
+            raise ImportError("The AsyncWikiArtScraper needs the httpx "
+                              "package: pip install artscraper[async]") from error
+        self.output_dir = output_dir
+        self.skip_existing = skip_existing
+        self.timeout = timeout
+        if rate_limiter is None:
+            rate_limiter = AdaptiveRateLimiter.from_min_wait(min_wait)
+        self.rate_limiter = rate_limiter
+        self._httpx = httpx
+        self.client = httpx.AsyncClient(
+            http2=http2, timeout=timeout, follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_concurrency))
+        self.max_concurrency = max_concurrency
+        # Created on first use, to bind them to the running event loop.
+        self._semaphore = None
+        self._login_lock = None
+        self.API_access_key, self.API_secret_key = read_api_keys()
+        self.session_key = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, _exc_type, _exc_val, _exc_tb):
+        await self.close()
+
+    def _init_locks(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._login_lock = asyncio.Lock()
+
+    async def _get_session_key(self):
+        """Read the previous session key or log in for a new one"""
+        if self.session_key is not None:
+            return self.session_key
+        self._init_locks()
+        async with self._login_lock:
+            if self.session_key is None:
+                await self._login()
+        return self.session_key
+
+    async def _login(self):
+        try:
+            with open(".wiki_session", "r", encoding="utf-8") as f:
+                self.session_key = f.read()
+        except FileNotFoundError:
+            response = await self._limited_get(
+                f"{API_URL}/login",
+                params={"accessCode": self.API_access_key,
+                        "secretCode": self.API_secret_key})
+            response.raise_for_status()
+            self.session_key = json.loads(response.text)["SessionKey"]
+            with open(".wiki_session", "w", encoding="utf-8") as f:
+                f.write(self.session_key)
+
+    async def _get_content(self, url, params):
+        """Get data through the WikiArt API with rate limits
+
+        Errors of the server (e.g. 429, 503) raise an HTTPStatusError
+        instead of the ValueError of a painting that cannot be found.
+        """
+        params["authSessionKey"] = await self._get_session_key()
+        response = await self._limited_get(url, params=params)
+        response.raise_for_status()
+        return json.loads(response.text)
+
+    async def _limited_get(self, url, params):
+        """Do a GET request with the rate limiter, and report the outcome"""
+        await self.rate_limiter.acquire_async(url)
+        start = time.monotonic()
+        try:
+            response = await self.client.get(url, params=params)
+        except self._httpx.TransportError:
+            self.rate_limiter.record(url, error=True)
+            raise
+        self._record(url, response, start)
+        return response
+
+    def _record(self, url, response, start):
+        """Report the status and latency of a response to the rate limiter"""
+        self.rate_limiter.record(
+            url, response.status_code, latency=time.monotonic() - start,
+            retry_after=parse_retry_after(response.headers.get("Retry-After")))
+
+    async def _find_by_artist_painting(self, link_dirs):
+        """Find the painting by searching for artist + painting name"""
+        params = {"term": search_terms(link_dirs)}
+        meta_data = await self._get_content(f"{API_URL}/PaintingSearch",
+                                            params)
+        for paint_meta in meta_data["data"]:
+            try:
+                return await self._check_metadata(paint_meta, link_dirs)
+            except ValueError:
+                pass
+        raise ValueError("Cannot find painting by artist + painting")
+
+    async def _find_by_scrape(self, link, link_dirs):
+        """Find the painting ID by scraping the artwork page"""
+        await self.rate_limiter.acquire_async(link)
+        scanner = PaintingIdScanner()
+        paint_id = None
+        start = time.monotonic()
+        recorded = False
+        try:
+            async with self.client.stream("GET", link) as response:
+                self._record(link, response, start)
+                recorded = True
+                if page_missing(response.status_code):
+                    raise ValueError("Cannot find painting by scrape.")
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes(chunk_size=2**14):
+                    paint_id = scanner.feed(chunk)
+                    if (paint_id is not None
+                            or scanner.n_read >= self.max_scrape_bytes):
+                        break
+        except self._httpx.TransportError:
+            if not recorded:
+                self.rate_limiter.record(link, error=True)
+            raise
+        if paint_id is None:
+            paint_id = scanner.finish()
+        if paint_id is None:
+            raise ValueError("Cannot find painting by scrape.")
+        return await self._check_metadata(paint_id, link_dirs)
+
+    async def _find_by_artist(self, link_dirs):
+        """Find the painting among all paintings by the artist"""
+        async for paint_meta in self.iter_artist_paintings(link_dirs[0]):
+            if paint_meta.get("url", link_dirs[1]) != link_dirs[1]:
+                continue
+            try:
+                return await self._check_metadata(paint_meta, link_dirs)
+            except ValueError:
+                pass
+        raise ValueError("Cannot find painting by artist.")
+
+    async def iter_artist_paintings(self, artist):
+        """Iterate lazily over all paintings by an artist.
+
+        Parameters
+        ----------
+        artist: str
+            Url slug of the artist, e.g. "vincent-van-gogh".
+
+        Returns
+        -------
+        AsyncIterator[dict]:
+            Painting data as in the search results of the WikiArt API.
+        """
+        params = {"term": artist.replace("-", " ")}
+        while True:
+            new_meta = await self._get_content(
+                f"{API_URL}/PaintingSearch", dict(params))
+            for paint_meta in new_meta.get("data") or []:
+                if paint_meta.get("artistUrl") == artist:
+                    yield paint_meta
+            if not new_meta.get("data") or not new_meta.get("hasMore"):
+                return
+            params["paginationToken"] = new_meta["paginationToken"]
+
+    async def _check_metadata(self, paint_meta, link_dirs):
+        """Get the meta data from a painting with validation"""
+        if isinstance(paint_meta, str):
+            paint_id = paint_meta
+        else:
+            paint_id = paint_meta["id"]
+        paint_data = await self.info_from_painting_id(paint_id)
+        if is_painting(paint_data, link_dirs):
+            return paint_data
+        raise ValueError("Painting is not the right one.")
+
+    async def info_from_painting_id(self, painting_id):
+        """Get the meta data from a painting_id"""
+        return await self._get_content(f"{API_URL}/Painting",
+                                       {"id": painting_id})
+
+    async def get_metadata(self, link, **kwargs):
+        """Obtain metadata from an url.
+
+        Arguments
+        ---------
+        link: str
+            The url to the artwork.
+        kwargs: dict
+            Extra items to add to the results.
+
+        Returns
+        -------
+        dict: metadata
+            The metadata related to the artwork in the link.
+        """
+        link_dirs = split_artwork_link(link)
+        # A failing server doesn't mean the painting doesn't exist: the
+        # other methods are still tried, and the error is raised if none of
+        # them finds the painting.
+        server_error = None
+        for find, args in [(self._find_by_artist_painting, (link_dirs, )),
+                           (self._find_by_scrape, (link, link_dirs))]:
+            try:
+                metadata = await find(*args)
+                break
+            except ValueError:
+                pass
+            except (OSError, self._httpx.HTTPError) as error:
+                server_error = error
+        else:
+            try:
+                metadata = await self._find_by_artist(link_dirs)
+            except ValueError:
+                if server_error is not None:
+                    raise server_error from None
+                raise
+        metadata["link"] = link
+        metadata.update(kwargs)
+        return metadata
+
+    def paint_dir(self, metadata):
+        """Directory to store the painting with this metadata.
+
+        Parameters
+        ----------
+        metadata: dict
+            Metadata of the painting, as returned by get_metadata.
+
+        Returns
+        -------
+        pathlib.Path:
+            Directory for the image and metadata of the painting.
+        """
+        if self.output_dir is None:
+            raise ValueError("Trying to save file with no path or output "
+                             "dir.")
+        return Path(self.output_dir, metadata["id"])
+
+    async def save_metadata(self, link, meta_fp=None, metadata=None):
+        """Save the metadata to a JSON file.
+
+        Arguments
+        ---------
+        link: str
+            The url to the artwork.
+        meta_fp: str, Path, optional
+            File to dump the data to, by default metadata.json in the
+            directory of the painting.
+        metadata: dict, optional
+            Metadata that was already retrieved for the link.
+        """
+        if metadata is None:
+            metadata = await self.get_metadata(link)
+        if meta_fp is None:
+            meta_fp = Path(self.paint_dir(metadata), "metadata.json")
+        meta_fp = Path(meta_fp)
+        if meta_fp.is_file():
+            return
+        meta_fp.parent.mkdir(exist_ok=True, parents=True)
+        with open(meta_fp, "w", encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False)
+
+    async def save_image(self, link, img_fp=None, metadata=None):
+        """Save the image of the artwork to a file.
+
+        Arguments
+        ---------
+        link: str
+            The url to the artwork.
+        img_fp: str, Path, optional
+            File to save the image to. If the image has a different
+            suffix from img_fp, it is changed.
+        metadata: dict, optional
+            Metadata that was already retrieved for the link.
+        """
+        if metadata is None:
+            metadata = await self.get_metadata(link)
+        img_url = metadata["image"]
+        suffix = Path(urlparse(img_url).path).suffix
+        if img_fp is None:
+            img_fp = Path(self.paint_dir(metadata), "artwork" + suffix)
+        elif Path(img_fp).suffix != suffix:
+            print(f"Warning: changing file extensions: "
+                  f"{Path(img_fp).suffix} -> {suffix}")
+            img_fp = Path(Path(img_fp).parent, Path(img_fp).stem + suffix)
+        img_fp = Path(img_fp)
+
+        if self.skip_existing and img_fp.is_file():
+            return
+        img_fp.parent.mkdir(exist_ok=True, parents=True)
+        # Write to a temporary file first, so no partial images remain, and
+        # resume interrupted transfers as SessionPool.download does.
+        part = PartialDownload(img_fp)
+        for _ in range(self.max_resumes + 1):
+            try:
+                if await self._download_part(img_url, part):
+                    return
+            except self._httpx.TransportError:
+                continue
+        raise IOError(f"Download of {img_url} was interrupted too many "
+                      f"times.")
+
+    async def _download_part(self, url, part):
+        """Continue a download, returns whether it is complete"""
+        async with self.client.stream(
+                "GET", url, headers=part.request_headers()) as response:
+            if part.offset and response.status_code == 416:
+                # Nothing left to get, but we can't verify the size.
+                part.discard()
+                return False
+            response.raise_for_status()
+            mode = part.start(response.status_code, response.headers)
+            if mode is None:
+                return False
+            with open(part.part_fp, mode) as f:
+                async for chunk in response.aiter_bytes():
+                    f.write(chunk)
+        return part.finish()
+
+    async def save_artwork_information(self, link):
+        """Save the metadata and image of an artwork.
+
+        Arguments
+        ---------
+        link: str
+            The url to the artwork.
+        """
+        self._init_locks()
+        async with self._semaphore:
+            metadata = await self.get_metadata(link)
+            await self.save_metadata(link, metadata=metadata)
+            await self.save_image(link, metadata=metadata)
+
+    async def scrape_many(self, links, retry_policy=None):
+        """Save the metadata and images of many artworks concurrently.
+
+        Arguments
+        ---------
+        links: list[str]
+            Urls to the artworks.
+        retry_policy: RetryPolicy, optional
+            Policy for retrying artworks that fail, by default no retries.
+
+        Returns
+        -------
+        list:
+            For each link None if it succeeded, otherwise the exception (of
+            the last attempt).
+        """
+        if retry_policy is None:
+            return await asyncio.gather(
+                *(self.save_artwork_information(link) for link in links),
+                return_exceptions=True)
+        results = await asyncio.gather(
+            *(retry_policy.call_async(self.save_artwork_information, link)
+              for link in links))
+        return [result.error for result in results]
+
+    async def get_metadata_many(self, links, retry_policy=None):
+        """Get the metadata of many artworks concurrently.
+
+        Arguments
+        ---------
+        links: list[str]
+            Urls to the artworks.
+        retry_policy: RetryPolicy, optional
+            Policy for retrying artworks that fail, by default no retries.
+
+        Returns
+        -------
+        list:
+            For each link the metadata, or the exception if it failed.
+        """
+        self._init_locks()
+
+        async def _get(link):
+            async with self._semaphore:
+                return await self.get_metadata(link)
+
+        if retry_policy is None:
+            return await asyncio.gather(*(_get(link) for link in links),
+                                        return_exceptions=True)
+        results = await asyncio.gather(
+            *(retry_policy.call_async(_get, link) for link in links))
+        return [result.value if result.ok else result.error
+                for result in results]
+
+    async def close(self):
+        """Close the connections of the client."""
+        await self.client.aclose()
@@ -9,6 +9,8 @@ from abc import ABC
 from abc import abstractmethod
 from pathlib import Path
 
+from artscraper.cache import LRUCache
+
 
 class BaseArtScraper(ABC):
     """Base class for ArtScrapers.
@@ -25,14 +27,21 @@ class BaseArtScraper(ABC):
     min_wait: float
         To avoid going over rate limits, this can be set a floating point
         number, which sets the minimum time between requests.
+    metadata_cache: LRUCache, optional
+        Cache of link -> metadata, by default an LRUCache with 128 entries
+        and no expiry. Supply e.g. LRUCache(maxsize=1000, ttl=3600) to
+        change its size or time-to-live.
     """
 
-    def __init__(self, output_dir=None, skip_existing=True, min_wait=None):
+    def __init__(self, output_dir=None, skip_existing=True, min_wait=None,
+                 *, metadata_cache=None):
         self.skip_existing = skip_existing
         self.output_dir = output_dir
 
         # Cache of metadata, in case it is needed more than once/later.
-        self._meta_store = {"link": "", "data": {}}
+        if metadata_cache is None:
+            metadata_cache = LRUCache()
+        self.metadata_cache = metadata_cache
         self.link = "None"
         self.min_wait = min_wait
 
@@ -113,15 +122,13 @@ class BaseArtScraper(ABC):
         if self.link == "None":
             raise ValueError("Load link or supply link to get meta data.")
 
-        if self.link == self._meta_store["link"]:
-            metadata = self._meta_store["data"]
-        else:
+        metadata = self.metadata_cache.get(self.link)
+        if metadata is None:
             metadata = self._get_metadata()
             metadata["link"] = self.link
-            self._meta_store = {
-                "link": self.link,
-                "data": metadata,
-            }
+            self.metadata_cache.put(self.link, metadata)
+        # Return a copy, so that the cached metadata stays untouched.
+        metadata = dict(metadata)
         metadata.update(kwargs)
         return metadata
 
@@ -0,0 +1,198 @@
+"""Firefox profiles for the scrapers that need a browser.
+
+The scrapers only read links, metadata or a single image from a page, so
+most of what a page loads (analytics, videos, fonts, thumbnails) is not
+needed. A BrowserProfile starts Firefox headless and blocks these
+resources, which makes pages load faster and lets more browsers run on
+the same machine. new_links reads the links on a page with a single
+script call, and prune_links removes the links that were read.
+"""
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from selenium.webdriver.firefox.service import Service as FirefoxService
+from webdriver_manager.firefox import GeckoDriverManager
+
+#: Url patterns (globs) of trackers and media that are blocked by default.
+DEFAULT_BLOCKED_URLS = (
+    "*://*.google-analytics.com/*",
+    "*://*.googletagmanager.com/*",
+    "*://*.doubleclick.net/*",
+    "*://*.googlesyndication.com/*",
+    "*://*.youtube.com/*",
+    "*://*.ytimg.com/*",
+    "*://fonts.googleapis.com/*",
+    "*://fonts.gstatic.com/*",
+    "*://*/*.mp4",
+    "*://*/*.webm",
+    "*://*/*.mp3",
+    "*://*/*.woff",
+    "*://*/*.woff2",
+)
+
+# Preferences that don't depend on the options of the profile.
+_PREFERENCES = {
+    # Don't play (or buffer) any audio or video.
+    "media.autoplay.default": 5,
+    "media.autoplay.blocking_policy": 2,
+    # Use the system fonts instead of downloading the fonts of the page.
+    "browser.display.use_document_fonts": 0,
+    "gfx.downloadable_fonts.enabled": False,
+    # Block known trackers with the built-in tracking protection.
+    "privacy.trackingprotection.enabled": True,
+    # No background traffic of the browser itself.
+    "app.update.enabled": False,
+    "browser.safebrowsing.malware.enabled": False,
+    "browser.safebrowsing.phishing.enabled": False,
+    "datareporting.healthreport.uploadEnabled": False,
+    "toolkit.telemetry.enabled": False,
+}
+
+
+class BrowserProfile:
+    """Settings for starting Firefox.
+
+    Parameters
+    ----------
+    headless: bool, default=True
+        Run the browser without a window.
+    load_images: bool, default=True
+        Load the images on pages. Disable this for runs that only need
+        metadata or links.
+    block_urls: iterable of str, optional
+        Url patterns (globs with * and ?) of requests that are blocked, by
+        default DEFAULT_BLOCKED_URLS. Blocking requests needs a version of
+        selenium with WebDriver BiDi (>=4.30); with older versions only the
+        built-in tracking protection is used.
+    window_size: tuple(int, int), optional
+        Width and height of the browser window in pixels, which determines
+        the size of screenshots. By default the size that Firefox chooses.
+    """
+
+    def __init__(self, headless=True, load_images=True,
+                 block_urls=DEFAULT_BLOCKED_URLS, window_size=None):
+        self.headless = headless
+        self.load_images = load_images
+        self.block_urls = list(block_urls or [])
+        self.window_size = window_size
+
+    def options(self):
+        """Options for Firefox with the settings of this profile.
+
+        Returns
+        -------
+        selenium.webdriver.FirefoxOptions:
+            Options to start Firefox with.
+        """
+        options = FirefoxOptions()
+        if self.headless:
+            options.add_argument("-headless")
+        if self.window_size is not None:
+            options.add_argument(f"--width={self.window_size[0]}")
+            options.add_argument(f"--height={self.window_size[1]}")
+        for name, value in _PREFERENCES.items():
+            options.set_preference(name, value)
+        if not self.load_images:
+            options.set_preference("permissions.default.image", 2)
+        if self.block_urls and hasattr(options, "enable_bidi"):
+            options.enable_bidi = True
+        return options
+
+    def new_driver(self):
+        """Start a new browser with this profile.
+
+        Returns
+        -------
+        selenium.webdriver.Firefox:
+            The browser.
+        """
+        driver = webdriver.Firefox(
+            options=self.options(),
+            service=FirefoxService(GeckoDriverManager().install()))
+        if self.window_size is not None:
+            driver.set_window_size(*self.window_size)
+        if self.block_urls:
+            _block_requests(driver, self.block_urls)
+        return driver
+
+
+def _block_requests(driver, url_patterns):
+    """Fail all requests of the browser that match one of the patterns"""
+    try:
+        driver.network.add_request_handler(
+            url_patterns, lambda request: request.fail())
+    except (AttributeError, TypeError, WebDriverException) as error:
+        print(f"Warning: cannot block requests with this version of "
+              f"selenium/Firefox ({error}).")
+
+
+_NEW_LINKS_JS = """
+const [selector, key] = arguments;
+const seen = window[key] || (window[key] = new Set());
+const links = [];
+for (const elem of document.querySelectorAll(
+        selector + ":not([data-" + key + "])")) {
+    elem.setAttribute("data-" + key, "");
+    const href = elem.href;
+    if (href && !seen.has(href)) {
+        seen.add(href);
+        links.push(href);
+    }
+}
+return links;
+"""
+
+
+def new_links(driver, selector, key="artscraper-seen"):
+    """Get the links on the page that weren't returned before.
+
+    All elements are read with a single script in the page, which marks
+    them, so that each element is only read once, whatever the number of
+    calls.
+
+    Parameters
+    ----------
+    driver: selenium.webdriver.Firefox
+        Browser with the page loaded.
+    selector: str
+        CSS selector (a single one, not a list) of the elements with links,
+        e.g. '[href*="/asset/"]'.
+    key: str, default="artscraper-seen"
+        Name under which the elements and links that were read are stored
+        in the page. Use a different key for independent collections.
+
+    Returns
+    -------
+    list[str]:
+        The new links (href) in the order of the page.
+    """
+    return driver.execute_script(_NEW_LINKS_JS, selector, key) or []
+
+
+_PRUNE_LINKS_JS = """
+const elems = document.querySelectorAll("[data-" + arguments[0] + "]");
+elems.forEach(elem => elem.remove());
+return elems.length;
+"""
+
+
+def prune_links(driver, key="artscraper-seen"):
+    """Remove the elements read by new_links from the page.
+
+    On pages that keep loading content (infinite scroll), this keeps the
+    memory of the browser from growing with every link that was read.
+
+    Parameters
+    ----------
+    driver: selenium.webdriver.Firefox
+        Browser with the page loaded.
+    key: str, default="artscraper-seen"
+        Key that was used with new_links.
+
+    Returns
+    -------
+    int:
+        Number of elements removed.
+    """
+    return driver.execute_script(_PRUNE_LINKS_JS, key) or 0
@@ -0,0 +1,396 @@
+"""Caches for metadata of artworks.
+
+LRUCache: Bounded in-memory cache with optional time-to-live.
+SQLiteCache: Persistent cache that can be shared between runs and processes.
+PaintingIndex: Index of (artist, painting) url slugs -> painting ids.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with optional time-to-live.
+
+    Parameters
+    ----------
+    maxsize: int, default=128
+        Maximum number of entries; the least recently used entry is evicted
+        when the cache is full.
+    ttl: float, optional
+        Time in seconds after which an entry expires. By default entries do
+        not expire.
+    """
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, count=False) is not None
+
+    def get(self, key, default=None, count=True):
+        """Get an entry from the cache.
+
+        Parameters
+        ----------
+        key: str
+            Key of the entry, e.g. the link to the artwork.
+        default: object, optional
+            Value to return if the entry is missing or expired.
+        count: bool, default=True
+            If true, update the hit/miss counters.
+
+        Returns
+        -------
+        object:
+            The cached value, or default.
+        """
+        with self._lock:
+            value, stored = self._data.get(key, (default, None))
+            if (stored is not None and self.ttl is not None
+                    and time.monotonic() - stored > self.ttl):
+                del self._data[key]
+                value, stored = default, None
+            if stored is not None:
+                self._data.move_to_end(key)
+            if count and stored is not None:
+                self.hits += 1
+            elif count:
+                self.misses += 1
+            return value
+
+    def put(self, key, value):
+        """Store an entry in the cache, evicting the oldest if needed.
+
+        Parameters
+        ----------
+        key: str
+            Key of the entry.
+        value: object
+            Value to store.
+        """
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._data.clear()
+
+    @property
+    def stats(self):
+        """dict: Number of hits, misses, evictions and current entries."""
+        return {"hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "size": len(self._data)}
+
+
+class SQLiteCache:
+    """Persistent cache of metadata and lookups in a SQLite file.
+
+    The cache maps links to painting ids and painting ids to their metadata,
+    and additionally stores responses of lookups (e.g. API searches), each
+    with the time they were fetched. The database is opened in WAL mode, so
+    that several threads and worker processes can use the same file at
+    the same time. It can be used as the metadata_cache of any scraper.
+
+    Parameters
+    ----------
+    db_fp: str or Path
+        File to store the cache in, created if it doesn't exist.
+    ttl: float, optional
+        Time in seconds after which entries have to be fetched again. By
+        default entries do not expire.
+    timeout: float, default=60
+        Time in seconds to wait for other processes that are writing.
+    """
+
+    def __init__(self, db_fp, ttl=None, timeout=60):
+        self.db_fp = Path(db_fp)
+        self.ttl = ttl
+        self.timeout = timeout
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        with self._connection() as conn:
+            conn.executescript(_SQLITE_SCHEMA)
+
+    def _connection(self):
+        """Connection for the current thread (connections can't be shared)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = _connect(self.db_fp, self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _fresh(self, fetched):
+        return self.ttl is None or time.time() - fetched <= self.ttl
+
+    def _count(self, value):
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def get(self, key, default=None):
+        """Get the metadata of a link.
+
+        Parameters
+        ----------
+        key: str
+            Link to the artwork.
+        default: object, optional
+            Value to return if the link is unknown or expired.
+
+        Returns
+        -------
+        dict:
+            Metadata of the artwork, or default.
+        """
+        row = self._connection().execute(
+            "SELECT paintings.metadata, paintings.fetched FROM links "
+            "JOIN paintings ON links.painting_id = paintings.painting_id "
+            "WHERE links.link = ?", (key,)).fetchone()
+        if row is None or not self._fresh(row[1]):
+            self._count(None)
+            return default
+        return self._count(json.loads(row[0]))
+
+    def put(self, key, value):
+        """Store the metadata of a link.
+
+        Parameters
+        ----------
+        key: str
+            Link to the artwork.
+        value: dict
+            Metadata of the artwork, which should have an "id" item.
+        """
+        painting_id = str(value["id"])
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO links VALUES (?, ?, ?)",
+                         (key, painting_id, now))
+            conn.execute("INSERT OR REPLACE INTO paintings VALUES (?, ?, ?)",
+                         (painting_id, json.dumps(value), now))
+
+    def get_painting(self, painting_id):
+        """Get the metadata of a painting id, or None if unknown/expired."""
+        row = self._connection().execute(
+            "SELECT metadata, fetched FROM paintings WHERE painting_id = ?",
+            (str(painting_id),)).fetchone()
+        if row is None or not self._fresh(row[1]):
+            return self._count(None)
+        return self._count(json.loads(row[0]))
+
+    def put_painting(self, painting_id, metadata):
+        """Store the metadata of a painting id."""
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO paintings VALUES (?, ?, ?)",
+                         (str(painting_id), json.dumps(metadata),
+                          time.time()))
+
+    def get_response(self, key):
+        """Get a stored lookup response, or None if unknown/expired."""
+        row = self._connection().execute(
+            "SELECT response, fetched FROM responses WHERE key = ?",
+            (key,)).fetchone()
+        if row is None or not self._fresh(row[1]):
+            return self._count(None)
+        return self._count(json.loads(row[0]))
+
+    def put_response(self, key, response):
+        """Store the (JSON serializable) response of a lookup."""
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                         (key, json.dumps(response), time.time()))
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM links")
+            conn.execute("DELETE FROM paintings")
+            conn.execute("DELETE FROM responses")
+
+    @property
+    def stats(self):
+        """dict: Number of hits and misses, and the number of entries."""
+        conn = self._connection()
+        sizes = {table: conn.execute(f"SELECT COUNT(*) FROM {table}"
+                                     ).fetchone()[0]
+                 for table in ["links", "paintings", "responses"]}
+        return {"hits": self.hits, "misses": self.misses, **sizes}
+
+    def close(self):
+        """Close the connection of the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class PaintingIndex:
+    """Index of WikiArt (artistUrl, url) slugs to painting ids.
+
+    It is filled with every painting the WikiArtScraper comes across in
+    search results, so that later links can be resolved with a single
+    request. If a file is supplied the index is stored on disk (SQLite),
+    otherwise it is only kept in memory.
+
+    Parameters
+    ----------
+    db_fp: str or Path, optional
+        File to store the index in. It can be the same file as that of a
+        SQLiteCache.
+    timeout: float, default=60
+        Time in seconds to wait for other processes that are writing.
+    """
+
+    def __init__(self, db_fp=None, timeout=60):
+        self.db_fp = None if db_fp is None else Path(db_fp)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._memory = {}
+        self._primed = set()
+        if self.db_fp is not None:
+            with self._connection() as conn:
+                conn.executescript(_INDEX_SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = _connect(self.db_fp, self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def __len__(self):
+        if self.db_fp is None:
+            return len(self._memory)
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM painting_index").fetchone()[0]
+
+    def get(self, artist_url, url):
+        """Get the painting id of a painting.
+
+        Parameters
+        ----------
+        artist_url: str
+            Url slug of the artist, e.g. "vincent-van-gogh".
+        url: str
+            Url slug of the painting, e.g. "the-starry-night-1889".
+
+        Returns
+        -------
+        str:
+            The painting id, or None if it is not in the index.
+        """
+        if self.db_fp is None:
+            return self._memory.get((artist_url, url))
+        row = self._connection().execute(
+            "SELECT painting_id FROM painting_index "
+            "WHERE artist_url = ? AND url = ?", (artist_url, url)).fetchone()
+        return None if row is None else row[0]
+
+    def update(self, paintings):
+        """Add paintings to the index.
+
+        Parameters
+        ----------
+        paintings: iterable of dict
+            Painting data as returned by the WikiArt API, with (at least)
+            the items "artistUrl", "url" and "id". Other entries are ignored.
+        """
+        rows = [(paint["artistUrl"], paint["url"], str(paint["id"]))
+                for paint in paintings
+                if isinstance(paint, dict) and paint.get("artistUrl")
+                and paint.get("url") and paint.get("id")]
+        if self.db_fp is None:
+            self._memory.update({row[:2]: row[2] for row in rows})
+            return
+        if rows:
+            with self._connection() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO painting_index VALUES (?, ?, ?)",
+                    rows)
+
+    def is_primed(self, artist_url):
+        """bool: Whether the whole catalogue of an artist is indexed."""
+        if self.db_fp is None:
+            return artist_url in self._primed
+        row = self._connection().execute(
+            "SELECT 1 FROM primed_artists WHERE artist_url = ?",
+            (artist_url, )).fetchone()
+        return row is not None
+
+    def set_primed(self, artist_url):
+        """Mark the whole catalogue of an artist as indexed."""
+        if self.db_fp is None:
+            self._primed.add(artist_url)
+            return
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO primed_artists VALUES (?, ?)",
+                         (artist_url, time.time()))
+
+    def close(self):
+        """Close the connection of the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _connect(db_fp, timeout):
+    """Open a SQLite connection in WAL mode, for concurrent use"""
+    conn = sqlite3.connect(db_fp, timeout=timeout)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS painting_index (
+    artist_url TEXT NOT NULL,
+    url TEXT NOT NULL,
+    painting_id TEXT NOT NULL,
+    PRIMARY KEY (artist_url, url)
+);
+CREATE TABLE IF NOT EXISTS primed_artists (
+    artist_url TEXT PRIMARY KEY,
+    fetched REAL NOT NULL
+);
+"""
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    link TEXT PRIMARY KEY,
+    painting_id TEXT NOT NULL,
+    fetched REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS paintings (
+    painting_id TEXT PRIMARY KEY,
+    metadata TEXT NOT NULL,
+    fetched REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    fetched REAL NOT NULL
+);
+"""
@@ -3,21 +3,30 @@ Get artist links from Google Arts & Culture webpage
 '''
 
 import time
+from pathlib import Path
 
-from selenium import webdriver
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from webdriver_manager.firefox import GeckoDriverManager
-
+from artscraper.browser import BrowserProfile
+from artscraper.browser import new_links
+from artscraper.browser import prune_links
 from artscraper.functions import random_wait_time
 
 def get_artist_links(webpage='https://artsandculture.google.com/category/artist',
-                     min_wait_time=5, output_file=None):
+                     min_wait_time=5, output_file=None, browser_profile=None,
+                     *, stream=False):
     '''
     Parameters
     ----------
     webpage : Web address of Google Arts & Culture artists page
     executable_path: Path to geckodriver
     output_file: File to which the list of links is to be written
+    browser_profile: BrowserProfile with the settings of the browser,
+        by default headless and without images
+    stream: If True, append new links to output_file after every scroll and
+        remove them from the page, so that the memory of the browser stays
+        flat. If output_file already has links (from a previous, interrupted
+        run), the page is scrolled without waiting between scrolls until the
+        last of these links is reached, after which the run continues
+        normally; links are never written twice.
 
     Returns
     -------
@@ -25,7 +34,17 @@ def get_artist_links(webpage='https://artsandculture.google.com/category/artist'
     '''
 
     # Launch Firefox browser
-    driver = webdriver.Firefox(service=FirefoxService(GeckoDriverManager().install()))
+    if browser_profile is None:
+        browser_profile = BrowserProfile(load_images=False)
+    driver = browser_profile.new_driver()
+
+    if stream:
+        if not output_file:
+            raise ValueError('Streaming the artist links needs an output_file')
+        try:
+            return _stream_artist_links(driver, webpage, min_wait_time, output_file)
+        finally:
+            driver.close()
 
     # Get Google Arts & Culture webpage listing all artists
     driver.get(webpage)
@@ -43,19 +62,10 @@ def get_artist_links(webpage='https://artsandculture.google.com/category/artist'
             break
         last_height = new_height
 
-    # Find xpaths containing artist links
-    elements = driver.find_elements('xpath', '//*[contains(@href,"categoryId=artist")]')
-
-    # List to store artist links
-    list_links = []
-    # Go through each xpath containing an artist link
-    for element in elements:
-        # Extract link to webpage
-        link = element.get_attribute('href')
-        # Remove trailing text
-        link = link.replace('?categoryId=artist', '')
-        # Append to list
-        list_links.append(link)
+    # Extract all artist links with a single call to the browser
+    list_links = _new_artist_links(driver)
+    # Remove duplicates, keeping the order
+    list_links = list(dict.fromkeys(list_links))
 
     # Close driver
     driver.close()
@@ -67,3 +77,84 @@ def get_artist_links(webpage='https://artsandculture.google.com/category/artist'
                 file.write('\n')
 
     return list_links
+
+
+_ARTIST_SELECTOR = '[href*="categoryId=artist"]'
+
+# Maximum time in seconds to wait for new links while fast-forwarding
+_FAST_FORWARD_TIMEOUT = 30
+
+
+def _new_artist_links(driver):
+    '''
+    Return the artist links on the page that weren't read before
+    '''
+
+    return [link.replace('?categoryId=artist', '')
+            for link in new_links(driver, _ARTIST_SELECTOR)]
+
+
+def _wait_for_artist_links(driver, timeout):
+    '''
+    Wait until the page shows artist links that weren't read yet, polling
+    instead of waiting a fixed time
+    '''
+
+    end_time = time.monotonic() + timeout
+    while time.monotonic() < end_time:
+        if driver.execute_script(
+                "return document.querySelectorAll(arguments[0]).length",
+                _ARTIST_SELECTOR + ':not([data-artscraper-seen])'):
+            return
+        time.sleep(0.25)
+
+
+def _stream_artist_links(driver, webpage, min_wait_time, output_file):
+    '''
+    Scroll through the artists page, appending new links to output_file
+    after every scroll and removing them from the page
+
+    Returns
+    -------
+    list_links : List with all links in output_file
+    '''
+
+    # Links saved by a previous run, as an ordered set
+    links = {}
+    if Path(output_file).is_file():
+        with open(output_file, 'r', encoding='utf-8') as file:
+            links = dict.fromkeys(line.strip() for line in file if line.strip())
+
+    # Scroll quickly past the links of the previous run, until its last link
+    last_saved = next(reversed(list(links)), None)
+    fast_forward = last_saved is not None
+
+    driver.get(webpage)
+
+    # Count number of scrolls for which no new elements appeared
+    n_tries = 0
+    with open(output_file, 'a', encoding='utf-8') as file:
+        while n_tries < 3:
+            found_links = _new_artist_links(driver)
+            if last_saved in found_links:
+                fast_forward = False
+            # Save links as soon as they are found, so that nothing is lost
+            # if the browser crashes
+            for link in found_links:
+                if link not in links:
+                    links[link] = None
+                    file.write(link)
+                    file.write('\n')
+            file.flush()
+            # Remove harvested links from the page to keep the DOM small
+            prune_links(driver)
+            n_tries = 0 if found_links else n_tries + 1
+            # Scroll down to bottom
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            # Wait to load page
+            if fast_forward:
+                _wait_for_artist_links(driver, _FAST_FORWARD_TIMEOUT)
+            else:
+                time.sleep(random_wait_time(min_wait=min_wait_time))
+
+    return list(links)
@@ -4,27 +4,31 @@ Class containing, among others, the following methods:
 get_artist_works: Get links to the artist's works, from Google Arts & Culture webpage
 get_artist_description: Get description of the artist, from Wikipedia
 get_artist_metadata: Get metadata of the artist, from Wikidata
+get_artists_metadata: Get metadata of many artists at once, from Wikidata
 
 '''
 
 from pathlib import Path
 
-import time
+import hashlib
 import re
-from urllib.parse import urlparse
 from urllib.parse import unquote
 import json
-import requests
 
-from selenium import webdriver
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from webdriver_manager.firefox import GeckoDriverManager
-
-import wikipediaapi
-
-from artscraper.functions import random_wait_time
-
-class FindArtworks:
+from artscraper.browser import BrowserProfile
+from artscraper.browser import new_links
+from artscraper.cache import SQLiteCache
+from artscraper.pipeline import run_pipeline
+from artscraper.ratelimit import AdaptiveRateLimiter
+from artscraper.session import SessionPool
+from artscraper.wikimedia import SPARQL_URL
+from artscraper.wikimedia import USER_AGENT
+from artscraper.wikimedia import WikidataResolver
+from artscraper.wikimedia import WikipediaExtracts
+from artscraper.wikimedia import sparql_values_query
+from artscraper.wikimedia import split_bindings
+
+class FindArtworks:  # pylint: disable=too-many-instance-attributes
     '''
     Class for finding artworks and metadata for an artist,
     given the link to their Google Arts & Culture webpage
@@ -34,7 +38,9 @@ class FindArtworks:
     # pylint: disable-msg=too-many-arguments
 
     def __init__(self, artist_link,
-                 output_dir='./data', sparql_query= None, min_wait_time=5):
+                 output_dir='./data', sparql_query= None, min_wait_time=5,
+                 *, browser_profile=None, wikidata_resolver=None, cache=None,
+                 wikipedia_extracts=None, rate_limiter=None):
 
         # Link to artist's Google Arts & Culture webpage
         self.artist_link = artist_link
@@ -45,69 +51,53 @@ class FindArtworks:
         self.output_dir = output_dir
         # Minimum wait time between two clicks while scrolling a webpage
         self.min_wait_time = min_wait_time
-
-        # SPARQL query to fetch metadata from wikidata
+        # Rate limiter for page loads, clicks and queries (per host), which
+        # slows down if a server has trouble keeping up
+        if rate_limiter is None:
+            rate_limiter = AdaptiveRateLimiter.from_min_wait(min_wait_time, jitter=2)
+        self.rate_limiter = rate_limiter
+
+        # SPARQL query to fetch metadata from wikidata, by default one
+        # that returns a single row per artist (see AGGREGATED_SPARQL_QUERY)
         if sparql_query is None:
-            # Default SPARQL query
-            self.sparql_query = '''
-                SELECT
-                ?familyName ?familyNameLabel
-                ?givenName ?givenNameLabel
-                ?pseudonym ?pseudonymLabel
-                ?sexOrGender ?sexOrGenderLabel
-                ?dateOfBirth ?dateOfBirthLabel
-                ?placeOfBirth ?placeOfBirthLabel
-                ?latitudeOfPlaceOfBirth ?latitudeOfPlaceOfBirthLabel
-                ?longitudeOfPlaceOfBirth ?longitudeOfPlaceOfBirthLabel
-                ?dateOfDeath ?dateOfDeathLabel
-                ?placeOfDeath ?placeOfDeathLabel
-                ?latitudeOfPlaceOfDeath ?latitudeOfPlaceOfDeathLabel
-                ?longitudeOfPlaceOfDeath ?longitudeOfPlaceOfDeathLabel
-                ?countryOfCitizenship ?countryOfCitizenshipLabel
-                ?residence ?residenceLabel
-                ?workLocation ?workLocationLabel
-                ?genre ?genreLabel
-                ?movement ?movementLabel
-                ?occupation ?occupationLabel
-                WHERE {
-                  OPTIONAL { wd:person_id wdt:P734 ?familyName. }
-                  OPTIONAL { wd:person_id wdt:P735 ?givenName. }
-                  OPTIONAL { wd:person_id wdt:P742 ?pseudonym. }
-                  OPTIONAL { wd:person_id wdt:P21 ?sexOrGender. }
-                  OPTIONAL {
-                      wd:person_id wdt:P569 ?dateTimeOfBirth.
-                      BIND (xsd:date(?dateTimeOfBirth) AS ?dateOfBirth)
-                  }
-                  OPTIONAL {
-                      wd:person_id wdt:P19 ?placeOfBirth.
-                      ?placeOfBirth wdt:P625 ?coordinatesBirth.
-                      BIND(geof:latitude(?coordinatesBirth) AS ?latitudeOfPlaceOfBirth)
-                      BIND(geof:longitude(?coordinatesBirth) AS ?longitudeOfPlaceOfBirth)
-                  }
-                  OPTIONAL {
-                      wd:person_id wdt:P570 ?dateTimeOfDeath.
-                      BIND (xsd:date(?dateTimeOfDeath) AS ?dateOfDeath)
-                  }
-                  OPTIONAL {
-                      wd:person_id wdt:P20 ?placeOfDeath.
-                      ?placeOfDeath wdt:P625 ?coordinatesDeath.
-                      BIND(geof:latitude(?coordinatesDeath) AS ?latitudeOfPlaceOfDeath)
-                      BIND(geof:longitude(?coordinatesDeath) AS ?longitudeOfPlaceOfDeath)
-                  }
-                  OPTIONAL { wd:person_id wdt:P27 ?countryOfCitizenship. }
-                  OPTIONAL { wd:person_id wdt:P551 ?residence. }
-                  OPTIONAL { wd:person_id wdt:P937 ?workLocation. }
-                  OPTIONAL { wd:person_id wdt:P136 ?genre. }
-                  OPTIONAL { wd:person_id wdt:P135 ?movement. }
-                  OPTIONAL { wd:person_id wdt:P106 ?occupation. }
-                  SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
-                }
-                '''
-        else:
-            self.sparql_query = sparql_query
-
-        # Open web browser
-        self.driver = webdriver.Firefox(service=FirefoxService(GeckoDriverManager().install()))
+            sparql_query = AGGREGATED_SPARQL_QUERY
+        self.sparql_query = sparql_query
+
+        # Web browser, headless and without images by default, since only
+        # links and text are read from the pages. It is opened when needed.
+        if browser_profile is None:
+            browser_profile = BrowserProfile(load_images=False)
+        self.browser_profile = browser_profile
+        self._driver = None
+
+        # Persistent cache (SQLiteCache) of the results of queries
+        if cache is not None and not isinstance(cache, SQLiteCache):
+            cache = SQLiteCache(cache)
+        self.cache = cache
+
+        # Connections to Wikipedia, shared by the resolver and extracts
+        # below, unless these are passed (e.g. to share them between artists)
+        self._session_pool = SessionPool(timeout=60)
+        # Resolver of Wikipedia articles to Wikidata IDs
+        if wikidata_resolver is None:
+            wikidata_resolver = WikidataResolver(
+                cache=self.cache, session_pool=self._session_pool,
+                rate_limiter=self.rate_limiter)
+        self.wikidata_resolver = wikidata_resolver
+        # Lead sections of Wikipedia articles, cached by revision
+        if wikipedia_extracts is None:
+            wikipedia_extracts = WikipediaExtracts(
+                cache=self.cache, session_pool=self._session_pool,
+                rate_limiter=self.rate_limiter)
+        self.wikipedia_extracts = wikipedia_extracts
+
+        # Values extracted for each artist link, so that pages are only
+        # visited once per artist
+        self._artist_cache = {}
+        # Artist link loaded in the browser, and whether its page is
+        # unchanged since loading it
+        self._loaded_link = None
+        self._page_unchanged = False
 
 
     def __enter__(self):
@@ -116,7 +106,72 @@ class FindArtworks:
 
     def __exit__(self, _exc_type, _exc_val, _exc_tb):
         # Close web browser
-        self.driver.close()
+        if self._driver is not None:
+            self._driver.close()
+        self._session_pool.close()
+
+
+    @property
+    def driver(self):
+
+        '''
+        Web browser, opened when it is first needed
+        '''
+
+        if self._driver is None:
+            self._driver = self.browser_profile.new_driver()
+        return self._driver
+
+
+    def _cached(self, name, compute):
+
+        '''
+        Return a value for the current artist, computing it only once
+
+        Parameters
+        ----------
+        name : Name of the value
+        compute : Function without arguments that computes the value
+        '''
+
+        artist_cache = self._artist_cache.setdefault(self.artist_link, {})
+        if name not in artist_cache:
+            artist_cache[name] = compute()
+        return artist_cache[name]
+
+
+    def _load_artist_page(self, unchanged=False):
+
+        '''
+        Load the artist's Google Arts & Culture webpage, unless it is already loaded
+
+        Parameters
+        ----------
+        unchanged : If True, reload the page if it was changed (e.g. by clicking)
+        '''
+
+        if (self._loaded_link != self.artist_link
+                or (unchanged and not self._page_unchanged)):
+            self.rate_limiter.acquire(self.artist_link)
+            self.driver.get(self.artist_link)
+            self._loaded_link = self.artist_link
+            self._page_unchanged = True
+
+
+    def _artist_page_info(self):
+
+        '''
+        Returns
+        -------
+        page_info : Dictionary with everything needed from the artist's page,
+            extracted in a single pass over the page
+        '''
+
+        def _extract():
+            self._load_artist_page()
+            return self.driver.execute_script(_ARTIST_PAGE_JS) or {}
+
+        return self._cached('page_info', _extract)
 
 
     def get_artist_information(self):
@@ -200,8 +255,33 @@ class FindArtworks:
 
         '''
 
-        # Get Google Arts & Culture webpage for the artist
-        self.driver.get(self.artist_link)
+        return self._cached('works', lambda: list(self.iter_artist_works()))
+
+
+    def iter_artist_works(self):
+
+        '''
+        Iterate over the artist's works while they are being discovered,
+        so that they can be processed (e.g. downloaded) in the meantime
+
+        Returns
+        -------
+        Iterator over the web addresses of the artist's works on Google Arts & Culture
+
+        '''
+
+        # Reuse the works if they were enumerated before
+        artist_cache = self._artist_cache.get(self.artist_link, {})
+        if 'works' in artist_cache:
+            yield from artist_cache['works']
+            return
+
+        # Get Google Arts & Culture webpage for the artist,
+        # with the carousel at the start
+        self._load_artist_page(unchanged=True)
+        # Read the rest of the page in the same visit
+        self._artist_page_info()
+        self._page_unchanged = False
 
         # Locate the section on the page containing the artworks, by searching for the text heading
         element = self.driver.find_element('xpath', '//*[contains(text(), "Discover this artist")]')
@@ -231,21 +311,16 @@ class FindArtworks:
 
             return right_arrow_element
 
-        # Get list of artwork links
-        def _get_list_links(parent_element):
-
-            # Find right arrow button
-            right_arrow_element = parent_element.find_element('xpath', \
-                './/*[contains(@data-gaaction,"rightArrow")]')
-
-            # List of all elements with links to artworks
-            elements = right_arrow_element.find_elements('xpath', \
-                '//*[contains(@href,"/asset/")]')
+        # Links to artworks, as an ordered set
+        links = {}
 
-            # Get the links from the XPath elements
-            list_links = [element.get_attribute('href') for element in elements]
-
-            return list_links
+        # Get the artwork links that weren't found before,
+        # with a single call to the browser
+        def _update_links():
+            found_links = [link for link in new_links(self.driver, '[href*="/asset/"]')
+                           if link not in links]
+            links.update(dict.fromkeys(found_links))
+            return found_links
 
         # Click on right arrow
         def _click_on_right_arrow(parent_element):
@@ -256,15 +331,15 @@ class FindArtworks:
             # Click on right arrow button
             self.driver.execute_script("arguments[0].click();", right_arrow_element)
 
-        list_links = _get_list_links(parent_element)
+        yield from _update_links()
 
         # Initialize count of number of iterations for which the number of artworks remains the same
         n_tries = 0
 
-        while (len(list_links) < total_num_artworks and n_tries < 3):
+        while (len(links) < total_num_artworks and n_tries < 3):
 
             # Save current number of artworks
-            old_num_artworks = len(list_links)
+            old_num_artworks = len(links)
 
             # Find right arrow element
             right_arrow_element =  _find_right_arrow_element(parent_element)
@@ -276,18 +351,40 @@ class FindArtworks:
                 _click_on_right_arrow(parent_element)
 
                 # Wait for page to load
-                time.sleep(random_wait_time(min_wait=self.min_wait_time))
+                self.rate_limiter.acquire(self.artist_link)
 
-                # Obtain new list of artworks
-                list_links = _get_list_links(parent_element)
+                # Add new artworks
+                yield from _update_links()
 
-            if len(list_links) == old_num_artworks:
+            if len(links) == old_num_artworks:
                 # Count number of iterations for which the number of artworks remains the same
                 n_tries = n_tries + 1
             else:
                 n_tries = 0
 
-        return list_links
+        self._artist_cache.setdefault(self.artist_link, {})['works'] = list(links)
+
+
+    def download_artist_works(self, scraper, maxsize=100):
+
+        '''
+        Download the artist's works while they are being discovered
+
+        Parameters
+        ----------
+        scraper: Scraper that downloads the works, e.g. a GoogleArtScraper
+            (with its own browser)
+        maxsize: Maximum number of discovered works waiting to be downloaded
+
+        Returns
+        -------
+        results: Dictionary with for each work None if it succeeded,
+            otherwise the exception
+
+        '''
+
+        return run_pipeline(self.iter_artist_works(),
+                            scraper.save_artwork_information, maxsize=maxsize)
 
 
     def get_artist_description(self):
@@ -308,22 +405,34 @@ class FindArtworks:
 
         # Get link to Wikipedia article
         wikipedia_article_link = self.get_wikipedia_article_link()
-        # Parse the URL
-        parsed_url = urlparse(wikipedia_article_link)
-        # Find the language of the Wikipedia article
-        language_code = parsed_url.netloc.split('.')[0]
-
-        # Choose the Wikipedia corresponding to the language code
-        wiki = wikipediaapi.Wikipedia(language_code)
-        # Get the Wikipedia page
-        page = wiki.page(title)
-        # Get summary of the page (lead section of the Wikipedia article)
-        description = page.summary
+
+        # Get lead section of the Wikipedia article, through the batched and cached
+        # extracts (use get_artists_descriptions for many artists at once)
+        description = self.wikipedia_extracts.get(
+            [wikipedia_article_link])[wikipedia_article_link]
 
         description = unquote(description)
 
         return description
 
+    def get_artists_descriptions(self, wikipedia_links):
+
+        '''
+        Get the descriptions of many artists, with a few requests per language
+
+        Parameters
+        ----------
+        wikipedia_links : Links to the Wikipedia articles of the artists
+
+        Returns
+        -------
+        descriptions : Dictionary with for each link the description of the artist
+            (lead section of the Wikipedia article)
+        '''
+
+        return {link: unquote(description) for link, description
+                in self.wikipedia_extracts.get(wikipedia_links).items()}
+
     def get_artist_metadata(self):
 
         '''
@@ -338,29 +447,104 @@ class FindArtworks:
         if artist_id is None:
             return None
 
-        # Wikidata database to query
-        url = 'https://query.wikidata.org/sparql'
+        return self.get_artists_metadata([artist_id])[artist_id]
+
+
+    def get_artists_metadata(self, wikidata_ids, chunk_size=50):
+
+        '''
+        Get the metadata of many artists, with one SPARQL query per chunk of artists
+
+        Parameters
+        ----------
+        wikidata_ids : Wikidata IDs of the artists
+        chunk_size : Number of artists per query, which should be small enough
+            to stay within the limits of the query service
+
+        Returns
+        -------
+        metadata: Dictionary with for each Wikidata ID the metadata of the artist
+            (as returned by get_artist_metadata), or None if nothing was found
+        '''
+
+        # The cached results are only valid for the same query
+        query_hash = hashlib.sha1(self.sparql_query.encode('utf-8')).hexdigest()[:16]
+
+        def _cache_key(wikidata_id):
+            return f'sparql:{query_hash}:{wikidata_id}'
+
+        # Look up artists in the cache first
+        metadata = {}
+        missing = []
+        for wikidata_id in dict.fromkeys(wikidata_ids):
+            cached = None if self.cache is None else self.cache.get_response(
+                _cache_key(wikidata_id))
+            if cached is not None:
+                metadata[wikidata_id] = cached['metadata']
+            else:
+                missing.append(wikidata_id)
+
+        for start in range(0, len(missing), chunk_size):
+            chunk = missing[start:start + chunk_size]
+            # Query all artists in the chunk at once, and split the results per artist
+            query = sparql_values_query(self.sparql_query, chunk)
+            bindings = split_bindings(self._query_wikidata(query))
+            for wikidata_id in chunk:
+                artist_bindings = bindings.get(wikidata_id)
+                artist_metadata = None
+                if artist_bindings:
+                    artist_metadata = self._metadata_from_bindings(artist_bindings)
+                metadata[wikidata_id] = artist_metadata
+                if self.cache is not None:
+                    self.cache.put_response(_cache_key(wikidata_id),
+                                            {'metadata': artist_metadata})
+
+        return metadata
+
 
-        # Replace person_id in SPARQL query with the wikidata ID of the artist
-        query = self.sparql_query.replace('person_id', artist_id)
+    def _query_wikidata(self, query):
+
+        '''
+        Returns
+        -------
+        data : Results of a SPARQL query, in JSON format
+        '''
 
         # Send query request
-        request = requests.get(url, params={'format': 'json', \
-                            'query': ''.join(query)}, timeout=120)
+        request = self._session_pool.get(SPARQL_URL, params={'format': 'json', 'query': query},
+                                         headers={'User-Agent': USER_AGENT}, timeout=120,
+                                         rate_limiter=self.rate_limiter)
+        request.raise_for_status()
 
         # Convert response to dictionary
-        data = request.json()
+        return request.json()
+
+
+    def _metadata_from_bindings(self, bindings):
+
+        '''
+        Parameters
+        ----------
+        bindings : Results (rows) of the SPARQL query for one artist
+
+        Returns
+        -------
+        metadata: Dictionary containing metadata about the artist
+        '''
 
         # Extract properties searched by the SPARQL query
         properties_query = re.findall(r"\?[^\s]*Label\b", self.sparql_query)
 
-        # Remove redundant prefix and suffix
-        properties = [property.removeprefix('?').removesuffix('Label') \
-                      for property in properties_query]
+        # Remove redundant prefix and suffix (and duplicates)
+        properties = list(dict.fromkeys(property.removeprefix('?').removesuffix('Label') \
+                                        for property in properties_query))
+
+        # Collect the values of all properties in one pass over the bindings
+        values = _property_values(bindings, properties)
 
         # Assemble metadata in a dictionary
         metadata = {re.sub(r'(\B[A-Z])', r' \1', property).lower(): \
-                    self._get_property(data, property) for property in properties}
+                    values[property] for property in properties}
 
         return metadata
 
@@ -374,20 +558,7 @@ class FindArtworks:
 
         '''
 
-        # Get Google Arts & Culture webpage for the artist
-        self.driver.get(self.artist_link)
-        # Allow bare-except
-        # pylint: disable=W0702
-        try:
-            # Locate the element containing the link to the artist's Wikipedia article
-            element = self.driver.find_element('xpath','//*[contains(@href,"wikipedia")]')
-        except:
-            return None
-
-        # Extract the link to the Wikipedia article
-        wikipedia_link = element.get_attribute('href')
-
-        return wikipedia_link
+        return self._artist_page_info().get('wikipedia_link')
 
     def get_wikipedia_article_title(self):
 
@@ -417,52 +588,194 @@ class FindArtworks:
         wikidata_id: Wikidata ID of the artist
         '''
 
-        # Get the link to the Wikipedia article
-        wikipedia_link = self.get_wikipedia_article_link()
+        # Look up the Wikidata ID over HTTP, instead of opening the Wikipedia article
+        def _resolve():
+            wikipedia_link = self.get_wikipedia_article_link()
+            if wikipedia_link is None:
+                return None
+            return self.wikidata_resolver.resolve([wikipedia_link])[wikipedia_link]
 
-        # Get Wikipedia page for the artist
-        if wikipedia_link is not None:
-            self.driver.get(wikipedia_link)
+        return self._cached('wikidata_id', _resolve)
+
+
+def _property_values(bindings, properties):
+
+    '''
+    Parameters
+    ----------
+    bindings : Results (rows) of a SPARQL query for one artist
+    properties : Properties to be extracted from the bindings
+
+    Returns
+    -------
+    values : Dictionary with for each property its value, its unique values
+        (in order of appearance) if there are several, or '' if there are none
+    '''
+
+    # Ordered sets of values for each property
+    property_values = {query_property: {} for query_property in properties}
+    keys = [(query_property + 'Label', property_values[query_property])
+            for query_property in properties]
+    for row in bindings:
+        for key, unique_values in keys:
+            if key in row:
+                # Aggregated queries concatenate all values in one binding
+                for value in row[key]['value'].split(LABEL_SEPARATOR):
+                    if value:
+                        unique_values[unquote(value)] = None
+
+    values = {}
+    for query_property, unique_values in property_values.items():
+        unique_values = list(unique_values)
+        if len(unique_values) == 0:
+            # Property doesn't exist
+            values[query_property] = ''
+        elif len(unique_values) == 1:
+            values[query_property] = unique_values[0]
         else:
-            return None
+            values[query_property] = unique_values
+    return values
 
-        # Find element containing the link to the Wikidata page
-        element = self.driver.find_element('xpath','//*[contains(@href,"www.wikidata.org")]')
-        # Extract the link to the Wikidata page
-        wikidata_link = element.get_attribute('href')
-        # Specify pattern of Wikidata ID
-        pattern = r'Q\d+'
-        # Search for pattern in the Wikidata link
-        match = re.search(pattern, wikidata_link)
-        # Find the Wikidata ID of the artist
-        wikidata_id = match.group(0)
 
-        return wikidata_id
+# Extract everything needed from the artist's page in one pass
+_ARTIST_PAGE_JS = '''
+const wikipedia = document.querySelector('[href*="wikipedia"]');
+return {wikipedia_link: wikipedia ? wikipedia.href : null};
+'''
 
 
-    def _get_property(self, data, query_property):
+# Separator of the values that are aggregated by GROUP_CONCAT
+LABEL_SEPARATOR = '\x1f'
 
-        '''
-        Parameters
-        ----------
-        data : Data, in JSON format, fetched from Wikidata query
-        query_property : Property to be extracted from data
-        Returns
-        -------
-        output_property_list : Value(s) of extracted property
-        '''
-
-        output_property_list = []
-        if query_property+'Label' in data['results']['bindings'][0].keys():
-            for element in data['results']['bindings']:
-                output_property = element[query_property+'Label']['value']
-                output_property = unquote(output_property)
-                # Avoid duplicates
-                if output_property not in output_property_list:
-                    output_property_list.append(output_property)
-            if len(output_property_list)==1:
-                output_property_list = output_property_list[0]
-            return output_property_list
-
-        # Property doesn't exist
-        return ''
+# Query that returns one row for each combination of values of the
+# properties, which can be thousands of rows for some artists
+EXPANDED_SPARQL_QUERY = '''
+                SELECT
+                ?familyName ?familyNameLabel
+                ?givenName ?givenNameLabel
+                ?pseudonym ?pseudonymLabel
+                ?sexOrGender ?sexOrGenderLabel
+                ?dateOfBirth ?dateOfBirthLabel
+                ?placeOfBirth ?placeOfBirthLabel
+                ?latitudeOfPlaceOfBirth ?latitudeOfPlaceOfBirthLabel
+                ?longitudeOfPlaceOfBirth ?longitudeOfPlaceOfBirthLabel
+                ?dateOfDeath ?dateOfDeathLabel
+                ?placeOfDeath ?placeOfDeathLabel
+                ?latitudeOfPlaceOfDeath ?latitudeOfPlaceOfDeathLabel
+                ?longitudeOfPlaceOfDeath ?longitudeOfPlaceOfDeathLabel
+                ?countryOfCitizenship ?countryOfCitizenshipLabel
+                ?residence ?residenceLabel
+                ?workLocation ?workLocationLabel
+                ?genre ?genreLabel
+                ?movement ?movementLabel
+                ?occupation ?occupationLabel
+                WHERE {
+                  OPTIONAL { wd:person_id wdt:P734 ?familyName. }
+                  OPTIONAL { wd:person_id wdt:P735 ?givenName. }
+                  OPTIONAL { wd:person_id wdt:P742 ?pseudonym. }
+                  OPTIONAL { wd:person_id wdt:P21 ?sexOrGender. }
+                  OPTIONAL {
+                      wd:person_id wdt:P569 ?dateTimeOfBirth.
+                      BIND (xsd:date(?dateTimeOfBirth) AS ?dateOfBirth)
+                  }
+                  OPTIONAL {
+                      wd:person_id wdt:P19 ?placeOfBirth.
+                      ?placeOfBirth wdt:P625 ?coordinatesBirth.
+                      BIND(geof:latitude(?coordinatesBirth) AS ?latitudeOfPlaceOfBirth)
+                      BIND(geof:longitude(?coordinatesBirth) AS ?longitudeOfPlaceOfBirth)
+                  }
+                  OPTIONAL {
+                      wd:person_id wdt:P570 ?dateTimeOfDeath.
+                      BIND (xsd:date(?dateTimeOfDeath) AS ?dateOfDeath)
+                  }
+                  OPTIONAL {
+                      wd:person_id wdt:P20 ?placeOfDeath.
+                      ?placeOfDeath wdt:P625 ?coordinatesDeath.
+                      BIND(geof:latitude(?coordinatesDeath) AS ?latitudeOfPlaceOfDeath)
+                      BIND(geof:longitude(?coordinatesDeath) AS ?longitudeOfPlaceOfDeath)
+                  }
+                  OPTIONAL { wd:person_id wdt:P27 ?countryOfCitizenship. }
+                  OPTIONAL { wd:person_id wdt:P551 ?residence. }
+                  OPTIONAL { wd:person_id wdt:P937 ?workLocation. }
+                  OPTIONAL { wd:person_id wdt:P136 ?genre. }
+                  OPTIONAL { wd:person_id wdt:P135 ?movement. }
+                  OPTIONAL { wd:person_id wdt:P106 ?occupation. }
+                  SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
+                }
+                '''
+
+# Query that returns a single row per artist, with all unique values of each
+# property concatenated (separated by LABEL_SEPARATOR)
+AGGREGATED_SPARQL_QUERY = '''
+SELECT
+(GROUP_CONCAT(DISTINCT ?familyNameL; separator="\\u001F") AS ?familyNameLabel)
+(GROUP_CONCAT(DISTINCT ?givenNameL; separator="\\u001F") AS ?givenNameLabel)
+(GROUP_CONCAT(DISTINCT STR(?pseudonym); separator="\\u001F") AS ?pseudonymLabel)
+(GROUP_CONCAT(DISTINCT ?sexOrGenderL; separator="\\u001F") AS ?sexOrGenderLabel)
+(GROUP_CONCAT(DISTINCT STR(?dateOfBirth); separator="\\u001F") AS ?dateOfBirthLabel)
+(GROUP_CONCAT(DISTINCT ?placeOfBirthL; separator="\\u001F") AS ?placeOfBirthLabel)
+(GROUP_CONCAT(DISTINCT STR(?latitudeOfPlaceOfBirth); separator="\\u001F")
+    AS ?latitudeOfPlaceOfBirthLabel)
+(GROUP_CONCAT(DISTINCT STR(?longitudeOfPlaceOfBirth); separator="\\u001F")
+    AS ?longitudeOfPlaceOfBirthLabel)
+(GROUP_CONCAT(DISTINCT STR(?dateOfDeath); separator="\\u001F") AS ?dateOfDeathLabel)
+(GROUP_CONCAT(DISTINCT ?placeOfDeathL; separator="\\u001F") AS ?placeOfDeathLabel)
+(GROUP_CONCAT(DISTINCT STR(?latitudeOfPlaceOfDeath); separator="\\u001F")
+    AS ?latitudeOfPlaceOfDeathLabel)
+(GROUP_CONCAT(DISTINCT STR(?longitudeOfPlaceOfDeath); separator="\\u001F")
+    AS ?longitudeOfPlaceOfDeathLabel)
+(GROUP_CONCAT(DISTINCT ?countryOfCitizenshipL; separator="\\u001F")
+    AS ?countryOfCitizenshipLabel)
+(GROUP_CONCAT(DISTINCT ?residenceL; separator="\\u001F") AS ?residenceLabel)
+(GROUP_CONCAT(DISTINCT ?workLocationL; separator="\\u001F") AS ?workLocationLabel)
+(GROUP_CONCAT(DISTINCT ?genreL; separator="\\u001F") AS ?genreLabel)
+(GROUP_CONCAT(DISTINCT ?movementL; separator="\\u001F") AS ?movementLabel)
+(GROUP_CONCAT(DISTINCT ?occupationL; separator="\\u001F") AS ?occupationLabel)
+WHERE {
+  OPTIONAL { wd:person_id wdt:P734 ?familyName. }
+  OPTIONAL { wd:person_id wdt:P735 ?givenName. }
+  OPTIONAL { wd:person_id wdt:P742 ?pseudonym. }
+  OPTIONAL { wd:person_id wdt:P21 ?sexOrGender. }
+  OPTIONAL {
+      wd:person_id wdt:P569 ?dateTimeOfBirth.
+      BIND (xsd:date(?dateTimeOfBirth) AS ?dateOfBirth)
+  }
+  OPTIONAL {
+      wd:person_id wdt:P19 ?placeOfBirth.
+      ?placeOfBirth wdt:P625 ?coordinatesBirth.
+      BIND(geof:latitude(?coordinatesBirth) AS ?latitudeOfPlaceOfBirth)
+      BIND(geof:longitude(?coordinatesBirth) AS ?longitudeOfPlaceOfBirth)
+  }
+  OPTIONAL {
+      wd:person_id wdt:P570 ?dateTimeOfDeath.
+      BIND (xsd:date(?dateTimeOfDeath) AS ?dateOfDeath)
+  }
+  OPTIONAL {
+      wd:person_id wdt:P20 ?placeOfDeath.
+      ?placeOfDeath wdt:P625 ?coordinatesDeath.
+      BIND(geof:latitude(?coordinatesDeath) AS ?latitudeOfPlaceOfDeath)
+      BIND(geof:longitude(?coordinatesDeath) AS ?longitudeOfPlaceOfDeath)
+  }
+  OPTIONAL { wd:person_id wdt:P27 ?countryOfCitizenship. }
+  OPTIONAL { wd:person_id wdt:P551 ?residence. }
+  OPTIONAL { wd:person_id wdt:P937 ?workLocation. }
+  OPTIONAL { wd:person_id wdt:P136 ?genre. }
+  OPTIONAL { wd:person_id wdt:P135 ?movement. }
+  OPTIONAL { wd:person_id wdt:P106 ?occupation. }
+  SERVICE wikibase:label {
+      bd:serviceParam wikibase:language "en".
+      ?familyName rdfs:label ?familyNameL.
+      ?givenName rdfs:label ?givenNameL.
+      ?sexOrGender rdfs:label ?sexOrGenderL.
+      ?placeOfBirth rdfs:label ?placeOfBirthL.
+      ?placeOfDeath rdfs:label ?placeOfDeathL.
+      ?countryOfCitizenship rdfs:label ?countryOfCitizenshipL.
+      ?residence rdfs:label ?residenceL.
+      ?workLocation rdfs:label ?workLocationL.
+      ?genre rdfs:label ?genreL.
+      ?movement rdfs:label ?movementL.
+      ?occupation rdfs:label ?occupationL.
+  }
+}
+GROUP BY wd:person_id
+'''
@@ -7,9 +7,10 @@ retry
 
 """
 
-import time
 from random import random
 
+from artscraper.retrying import RetryPolicy
+
 def random_wait_time(min_wait=5, max_wait=None):
     """Compute a random wait time.
 
@@ -50,31 +51,43 @@ def random_wait_time(min_wait=5, max_wait=None):
     return inv_cdf(random())
 
 
+class _RetryAll(RetryPolicy):
+    '''Retry policy that retries every exception, waiting between
+    base_delay and 3*base_delay before each retry (or longer if the server
+    asked to with Retry-After)'''
+
+    def is_retryable(self, error):
+        return True
+
+    def delay(self, attempt, error=None):
+        min_wait = random_wait_time(self.base_delay) if self.base_delay > 0 else 0
+        return max(min_wait, super().delay(attempt, error))
+
+
 def retry(function, max_retries, min_wait_time, *args):
     '''
     Parameters
     ----------
     function: Function to run again
-    max_retries: Maximum number of times to retry
+    max_retries: Maximum number of times to run the function
+    min_wait_time: Minimum wait time before each retry; the actual time is
+        drawn between min_wait_time and 3*min_wait_time
     args: Arguments of the function
 
     Returns
     -------
-    Value returned by function, or prints an error message
+    Value returned by function, or None (after printing an error message)
+    if it failed. Every exception is retried; use artscraper.RetryPolicy to
+    retry only the errors that retrying can solve, and to get the errors
+    themselves.
     '''
 
-    # Want to catch all kinds of exceptions
-    # pylint: disable=broad-except
-
-    num_attempt = 0
-    while num_attempt < max_retries:
-
-        try:
-            return function(*args)
-        except Exception as error:
-            print(f'Function {function} failed at attempt {num_attempt} \
-            with exception {repr(error)}')
-            time.sleep(random_wait_time(min_wait=min_wait_time))
-            num_attempt = num_attempt + 1
-
-    return None
+    if max_retries < 1:
+        return None
+    policy = _RetryAll(max_attempts=max_retries, base_delay=min_wait_time,
+                       multiplier=1, budget=None)
+    result = policy.call(function, *args)
+    if not result.ok:
+        print(f'Function {function} failed after {result.attempts} '
+              f'attempt(s) with exception {repr(result.error)}')
+    return result.value
@@ -1,9 +1,10 @@
 """Module for GoogleArtScraper class."""
 
 import json
+import queue
+import threading
 import time
 from pathlib import Path
-from time import sleep
 from urllib.parse import urlparse
 from urllib.parse import unquote
 
@@ -12,14 +13,18 @@ import hashlib
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from webdriver_manager.firefox import GeckoDriverManager
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.ui import WebDriverWait
 
 from artscraper.base import BaseArtScraper
-from artscraper.functions import random_wait_time
+from artscraper.browser import BrowserProfile
+from artscraper.ratelimit import AdaptiveRateLimiter
+from artscraper.session import SessionPool
 
-class GoogleArtScraper(BaseArtScraper):
+class GoogleArtScraper(BaseArtScraper):  # pylint: disable=too-many-instance-attributes
     """Class for scraping GoogleArt images.
 
     Parameters
@@ -29,19 +34,74 @@ class GoogleArtScraper(BaseArtScraper):
     skip_existing: bool, default=True
         Skip exisisting images/urls.
     min_wait: int or float, default=5
-        Before performing another action, ensure a waiting time
+        Before loading another page, ensure a waiting time
         of at least this value in seconds. The actual waiting time
-        is randomly drawn from a polynomial distribution.
+        is randomly drawn between min_wait and 3*min_wait, and is
+        increased if the server has trouble keeping up.
+    metadata_cache: LRUCache, optional
+        Cache of link -> metadata, see BaseArtScraper.
+    session_pool: SessionPool, optional
+        Pool of HTTP sessions to download pages with (metadata_backend
+        "http").
+    rate_limiter: AdaptiveRateLimiter or TokenBucket, optional
+        Rate limiter for loading pages, by default an adaptive one based on
+        min_wait. It can be shared by several scrapers (browsers) to stay
+        within one budget together.
+    ready_timeout: float, default=30
+        Maximum time in seconds to wait for a page or image to be ready.
+        Within a page, the scraper waits for the elements it needs instead
+        of fixed times.
+    metadata_backend: str, default="browser"
+        How to obtain the metadata: "browser" reads it from the page in
+        Firefox; "http" downloads and parses the page without a browser,
+        falling back to the browser if that fails. With "http", the
+        browser is only started once it is needed (e.g. for screenshots).
+    browser_profile: BrowserProfile, optional
+        Settings of the browser, by default headless with trackers and
+        media blocked.
     """
 
-    def __init__(self, output_dir=None, skip_existing=True, min_wait=5):
-        super().__init__(output_dir, skip_existing, min_wait=min_wait)
-
-        self.driver = webdriver.Firefox(service=FirefoxService(GeckoDriverManager().install()))
-        self.last_request = time.time() - 100
+    # pylint: disable-msg=too-many-arguments
+    def __init__(self, output_dir=None, skip_existing=True, min_wait=5,
+                 *, metadata_cache=None, session_pool=None,
+                 rate_limiter=None, ready_timeout=30,
+                 metadata_backend="browser", browser_profile=None):
+        super().__init__(output_dir, skip_existing, min_wait=min_wait,
+                         metadata_cache=metadata_cache)
+        if metadata_backend not in ("browser", "http"):
+            raise ValueError(
+                f"Unknown metadata backend '{metadata_backend}'.")
+        self.metadata_backend = metadata_backend
+        self._own_pool = session_pool is None
+        if session_pool is None:
+            session_pool = SessionPool(timeout=60)
+        self.session_pool = session_pool
+        if rate_limiter is None:
+            rate_limiter = _default_rate_limiter(min_wait)
+        self.rate_limiter = rate_limiter
+        self.ready_timeout = ready_timeout
+        if browser_profile is None:
+            browser_profile = BrowserProfile()
+        self.browser_profile = browser_profile
+
+        self._driver = None
+        # Link of the page loaded in the browser and (link, html) of the
+        # page downloaded without browser.
+        self._page_link = None
+        self._page_html = (None, None)
+        if metadata_backend == "browser":
+            self._driver = self._new_driver()
 
     def __exit__(self, _exc_type, _exc_val, _exc_tb):
-        self.driver.close()
+        if self._driver is not None:
+            self._driver.close()
+
+    @property
+    def driver(self):
+        """selenium.webdriver.Firefox: The browser, started when needed."""
+        if self._driver is None:
+            self._driver = self._new_driver()
+        return self._driver
 
     def load_link(self, link):
         if link == self.link:
@@ -54,10 +114,159 @@ class GoogleArtScraper(BaseArtScraper):
                     and Path(self.paint_dir, "artwork.png").stat().st_size>0):
                 return False
             self.paint_dir.mkdir(exist_ok=True, parents=True)
-        self.wait(self.min_wait)
-        self.driver.get(link)
+        if self.metadata_backend == "browser":
+            self._load_page()
         return True
 
+    def _load_page(self):
+        """Load the current link in the browser, if not done yet"""
+        if self._page_link == self.link:
+            return
+        self.rate_limiter.acquire(self.link)
+        start = time.monotonic()
+        try:
+            self.driver.get(self.link)
+        except WebDriverException:
+            self.rate_limiter.record(self.link, error=True)
+            raise
+        self.rate_limiter.record(self.link, latency=time.monotonic() - start)
+        self._page_link = self.link
+
+    def _get_page_html(self):
+        """Download the page of the current link without the browser"""
+        if self._page_html[0] != self.link:
+            response = self.session_pool.get(self.link, headers=_HTTP_HEADERS,
+                                             rate_limiter=self.rate_limiter)
+            response.raise_for_status()
+            self._page_html = (self.link, response.text)
+        return self._page_html[1]
+
+    def _new_driver(self):
+        """Start a new browser"""
+        return self.browser_profile.new_driver()
+
+    def restart_browser(self):
+        """Close the browser and start a fresh one.
+
+        This releases the memory that a long-running browser accumulates,
+        and recovers from a crashed browser.
+        """
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except WebDriverException:
+                pass
+        self._driver = self._new_driver()
+        self._page_link = None
+        self.link = "None"
+
+    @classmethod
+    def scrape_many(cls, links, browsers=2, recycle_after=100,
+                    rate_limiter=None, **kwargs):
+        """Save the metadata and images of artworks with several browsers.
+
+        The links are put in a queue, from which each browser takes the
+        next link when it is done with the previous one. All browsers
+        share one rate limiter for loading pages.
+
+        Parameters
+        ----------
+        links: list[str]
+            Urls of the artworks.
+        browsers: int, default=2
+            Number of browsers to run at the same time.
+        recycle_after: int, default=100
+            Restart a browser after it has loaded this many pages. A browser
+            is also restarted if it crashes.
+        rate_limiter: AdaptiveRateLimiter or TokenBucket, optional
+            Rate limiter shared by all browsers, by default an adaptive one
+            based on min_wait.
+        kwargs:
+            Arguments for each GoogleArtScraper, e.g. output_dir and
+            min_wait.
+
+        Returns
+        -------
+        dict:
+            For each link None if it succeeded, otherwise the exception. If
+            no browser could be started (or all of them failed), the links
+            that were left get the error of the browser.
+        """
+        if rate_limiter is None:
+            rate_limiter = _default_rate_limiter(kwargs.get("min_wait", 5))
+        work = queue.Queue()
+        for link in links:
+            work.put(link)
+        results = {}
+        worker_errors = []
+
+        def _worker():
+            # Errors are passed on to the links that are left.
+            # pylint: disable=broad-except
+            try:
+                scraper = cls(rate_limiter=rate_limiter, **kwargs)
+            except Exception as error:
+                worker_errors.append(error)
+                return
+            try:
+                scraper.work_through(work, results, recycle_after)
+            except Exception as error:
+                worker_errors.append(error)
+            finally:
+                scraper.close()
+
+        threads = [threading.Thread(target=_worker)
+                   for _ in range(min(browsers, len(links)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        while worker_errors:
+            try:
+                results[work.get_nowait()] = worker_errors[-1]
+            except queue.Empty:
+                break
+        return results
+
+    def work_through(self, work, results, recycle_after=100):
+        """Save the artworks from a queue of links until it is empty.
+
+        Parameters
+        ----------
+        work: queue.Queue
+            Queue with urls of artworks.
+        results: dict
+            For each link None is stored if it succeeded, otherwise the
+            exception.
+        recycle_after: int, default=100
+            Restart the browser after it has loaded this many pages.
+        """
+        n_pages = 0
+        while True:
+            try:
+                link = work.get_nowait()
+            except queue.Empty:
+                return
+            if n_pages >= recycle_after:
+                self.restart_browser()
+                n_pages = 0
+            n_pages += 1
+            # Failures of one artwork shouldn't stop the others.
+            # pylint: disable=broad-except
+            try:
+                self.save_artwork_information(link)
+                results[link] = None
+            except (NoSuchElementException, TimeoutException) as error:
+                # The page is at fault, not the browser.
+                results[link] = error
+            except WebDriverException as error:
+                # The browser probably crashed.
+                results[link] = error
+                self.restart_browser()
+                n_pages = 0
+            except Exception as error:
+                results[link] = error
+
     @property
     def paint_dir(self):
 
@@ -93,25 +302,35 @@ class GoogleArtScraper(BaseArtScraper):
 
         return Path(self.output_dir, paint_id)
 
-    def wait(self, min_wait, max_wait=None, update=True):
-        """Wait until we are allowed to perform our next action.
+    def wait_until(self, condition, timeout=None):
+        """Wait until a condition on the page is met.
 
         Parameters
         ----------
-        min_wait: int or float
-            Minimum waiting time before performing the action.
-        max_wait: int or float, optional
-            Maximum waiting time before performing an action. By default
-            3 times the minimum waiting time.
-        update: bool, default=True
-            If true, reset the timer.
+        condition: callable
+            Function of the driver, which returns a truthy value once the
+            condition is met (see selenium's expected_conditions).
+        timeout: float, optional
+            Maximum time to wait, by default ready_timeout.
+
+        Returns
+        -------
+        object:
+            The value returned by the condition, or None on a timeout.
         """
-        time_elapsed = time.time() - self.last_request
-        wait_time = random_wait_time(min_wait, max_wait) - time_elapsed
-        if wait_time > 0:
-            sleep(wait_time)
-        if update:
-            self.last_request = time.time()
+        if timeout is None:
+            timeout = self.ready_timeout
+        try:
+            return WebDriverWait(self.driver, timeout, poll_frequency=0.2,
+                                 ignored_exceptions=[NoSuchElementException]
+                                 ).until(condition)
+        except TimeoutException:
+            return None
+
+    def _wait_for_metadata(self):
+        """Wait until the metadata of the artwork is on the page"""
+        return self.wait_until(expected_conditions.presence_of_element_located(
+            ("xpath", '//*[starts-with(@id, "metadata-")]')))
 
     def get_main_text(self):
         """Get the main text for the artwork.
@@ -121,7 +340,8 @@ class GoogleArtScraper(BaseArtScraper):
         str:
             The main text that was found.
         """
-        self.wait(self.min_wait, update=False)
+        self._load_page()
+        self._wait_for_metadata()
         try:
             elem = self.driver.find_element(
                 "xpath",
@@ -140,25 +360,25 @@ class GoogleArtScraper(BaseArtScraper):
             return metadata
 
         paint_id = urlparse(self.link).path.split("/")[-1]
-        self.wait(self.min_wait, update=False)
-        elem = self.driver.find_element("xpath", f'//*[@id="metadata-{paint_id}"]')
+        if self.metadata_backend == "http":
+            try:
+                return _parse_metadata(self._get_page_html(), paint_id)
+            except (ValueError, OSError) as error:
+                print(f"Warning: cannot get the metadata of {self.link} "
+                      f"without browser, using the browser ({error}).")
+
+        self._load_page()
+        elem = self.wait_until(expected_conditions.presence_of_element_located(
+            ("xpath", f'//*[@id="metadata-{paint_id}"]')))
+        if elem is None:
+            elem = self.driver.find_element("xpath", f'//*[@id="metadata-{paint_id}"]')
         inner_HTML = elem.get_attribute("innerHTML")
         soup = BeautifulSoup(inner_HTML, features="html.parser")
-
-        paragraph_HTML = soup.find_all("li")
-        metadata = {}
-        metadata["main_text"] = self.get_main_text()
-        metadata["main_text"] = unquote(metadata["main_text"])
-        for par in paragraph_HTML:
-            name = par.find("span", text=True).contents[0].lower()[:-1]
-            metadata[name] = par.text[len(name) + 2:]
-            metadata[name] = unquote(metadata[name])
-        metadata["id"] = paint_id
-        return metadata
+        return _metadata_from_soup(soup, self.get_main_text(), paint_id)
 
     def get_image(self):
         """Get a binary PNG image in memory."""
-        self.wait(self.min_wait)
+        self._load_page()
 
         def _find_clickable_element_to_enlarge_image():
             try:
@@ -173,19 +393,23 @@ class GoogleArtScraper(BaseArtScraper):
             return elem
 
         # Find element to click on to enlarge image
-        elem = _find_clickable_element_to_enlarge_image()
+        elem = self.wait_until(
+            lambda driver: _find_clickable_element_to_enlarge_image())
+        if elem is None:
+            elem = _find_clickable_element_to_enlarge_image()
 
         webdriver.ActionChains(
             self.driver).move_to_element(elem).click(elem).perform()
 
-        self.wait(self.min_wait * 2, update=False)
+        # Wait until the enlarged image is loaded and no longer changes.
+        self.wait_until(_RenderedImage(
+            _find_clickable_element_to_enlarge_image))
 
         # Find element to click on to enlarge image, again
         elem = _find_clickable_element_to_enlarge_image()
 
         img = elem.screenshot_as_png
 
-        self.wait(self.min_wait)
         self.driver.find_element("xpath", "/html/body").send_keys(Keys.ESCAPE)
 
         return img
@@ -231,4 +455,89 @@ class GoogleArtScraper(BaseArtScraper):
 
 
     def close(self):
-        self.driver.quit()
+        if self._driver is not None:
+            self._driver.quit()
+        if self._own_pool:
+            self.session_pool.close()
+
+
+def _default_rate_limiter(min_wait):
+    """Adaptive rate limiter with random waits between min_wait and 3x"""
+    return AdaptiveRateLimiter.from_min_wait(min_wait, jitter=2)
+
+
+try:
+    import lxml  # pylint: disable=unused-import
+    _PARSER = "lxml"
+except ImportError:
+    _PARSER = "html.parser"
+
+# Ask for the same (English) page as the browser gets.
+_HTTP_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (X11; Linux x86_64; rv:120.0) "
+                   "Gecko/20100101 Firefox/120.0"),
+    "Accept-Language": "en-US,en;q=0.5",
+}
+
+
+def _metadata_from_soup(soup, main_text, paint_id):
+    """Create the metadata dictionary from the metadata list"""
+    paragraph_HTML = soup.find_all("li")
+    metadata = {}
+    metadata["main_text"] = unquote(main_text)
+    for par in paragraph_HTML:
+        name = par.find("span", text=True).contents[0].lower()[:-1]
+        metadata[name] = par.text[len(name) + 2:]
+        metadata[name] = unquote(metadata[name])
+    metadata["id"] = paint_id
+    return metadata
+
+
+def _parse_metadata(html, paint_id):
+    """Get the metadata from the html of an artwork page"""
+    soup = BeautifulSoup(html, features=_PARSER)
+    elem = soup.find(id=f"metadata-{paint_id}")
+    if elem is None:
+        raise ValueError("Cannot find the metadata on the page.")
+
+    # The main text is in a div directly in the first section of the page,
+    # if there is any (as section[1]/div in get_main_text).
+    main_text = ""
+    section = elem.find_parent("section")
+    if section is not None and section.parent is not None:
+        first_section = section.parent.find("section", recursive=False)
+        first_div = first_section.find("div", recursive=False)
+        if (first_div is not None
+                and not first_div.get("id", "").startswith("metadata-")):
+            main_text = first_div.text
+    try:
+        return _metadata_from_soup(elem, main_text, paint_id)
+    except (AttributeError, IndexError, TypeError) as error:
+        # The page is laid out differently than expected.
+        raise ValueError("Cannot parse the metadata on the page.") from error
+
+
+_RENDER_STATE_JS = """
+const elem = arguments[0];
+const rect = elem.getBoundingClientRect();
+const images = Array.from(elem.querySelectorAll("img"));
+const loaded = images.every(img => img.complete && img.naturalWidth > 0);
+return [rect.width, rect.height, images.length, loaded,
+        document.readyState === "complete"];
+"""
+
+
+class _RenderedImage:  # pylint: disable=too-few-public-methods
+    """Condition: the image element is loaded and its size is stable"""
+
+    def __init__(self, find_element):
+        self.find_element = find_element
+        self.last_state = None
+
+    def __call__(self, driver):
+        elem = self.find_element()
+        state = driver.execute_script(_RENDER_STATE_JS, elem)
+        ready = (state == self.last_state and state[3] and state[4]
+                 and state[0] > 0 and state[1] > 0)
+        self.last_state = state
+        return elem if ready else False
@@ -0,0 +1,84 @@
+"""Process items while they are still being discovered.
+
+run_pipeline: Feed the items of an iterator through a bounded queue into a
+consumer, so that discovering and processing (e.g. downloading) overlap.
+"""
+
+import queue
+import threading
+
+_DONE = object()
+
+
+def run_pipeline(items, process, maxsize=100):
+    """Process the items of an iterator while it is producing them.
+
+    The iterator runs in a background thread and puts its items in a
+    queue, from which they are processed in the calling thread. If the
+    queue is full, the iterator waits, so that discovery doesn't run far
+    ahead of processing.
+
+    Parameters
+    ----------
+    items: iterable
+        Items to process, e.g. FindArtworks.iter_artist_works().
+    process: callable
+        Function that processes a single item, e.g.
+        GoogleArtScraper.save_artwork_information.
+    maxsize: int, default=100
+        Maximum number of items waiting in the queue.
+
+    Returns
+    -------
+    dict:
+        For each item None if it was processed, otherwise the exception.
+        An exception raised by the iterator itself is raised again after
+        all items it produced have been processed.
+    """
+    work = queue.Queue(maxsize=maxsize)
+    producer_error = []
+    stop = threading.Event()
+
+    def _put(item):
+        """Put an item in the queue, unless processing has stopped"""
+        while not stop.is_set():
+            try:
+                work.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce():
+        # Errors are passed on to the calling thread.
+        # pylint: disable=broad-except
+        try:
+            for item in items:
+                if not _put(item):
+                    return
+        except Exception as error:
+            producer_error.append(error)
+        finally:
+            _put(_DONE)
+
+    producer = threading.Thread(target=_produce, daemon=True)
+    producer.start()
+    results = {}
+    try:
+        while True:
+            item = work.get()
+            if item is _DONE:
+                break
+            # Failures of one item shouldn't stop the others.
+            # pylint: disable=broad-except
+            try:
+                process(item)
+                results[item] = None
+            except Exception as error:
+                results[item] = error
+    finally:
+        stop.set()
+        producer.join()
+    if producer_error:
+        raise producer_error[0]
+    return results
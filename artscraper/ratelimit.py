@@ -0,0 +1,303 @@
+"""Rate limiters shared between threads and coroutines.
+
+TokenBucket: Requests-per-second budget for any number of workers.
+AdaptiveRateLimiter: Per-host rate that adapts to how the server responds.
+
+Both have the same methods, so that the scrapers can use either: acquire
+(or acquire_async) before a request, and record (or record_response)
+after it. The TokenBucket ignores what is recorded.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from random import random
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Token bucket rate limiter.
+
+    Tokens are added at a fixed rate, up to the capacity of the bucket.
+    Every request takes one token; if there are none left, the request waits
+    until its token has been added. Waiting requests are served in order.
+    The same bucket can be used from threads (acquire) and coroutines
+    (acquire_async) at the same time, so that all of them together stay
+    within the same budget.
+
+    Parameters
+    ----------
+    rate: float
+        Number of requests per second.
+    capacity: int, default=1
+        Maximum number of requests that can be done in a burst.
+    """
+
+    def __init__(self, rate, capacity=1):
+        if rate <= 0:
+            raise ValueError("The rate of a TokenBucket should be positive.")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last_update = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_min_wait(cls, min_wait):
+        """Create a bucket with one request every `min_wait` seconds.
+
+        Parameters
+        ----------
+        min_wait: float
+            Minimum time between requests in seconds.
+
+        Returns
+        -------
+        TokenBucket:
+            Bucket with a rate of 1/min_wait, without bursts.
+        """
+        return cls(1 / min_wait, capacity=1)
+
+    def _reserve(self):
+        """Take a token and return the time to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._last_update) * self.rate)
+            self._last_update = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+    def acquire(self, url=None):  # pylint: disable=unused-argument
+        """Wait (blocking) until the next request is allowed."""
+        wait_time = self._reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    async def acquire_async(self, url=None):  # pylint: disable=unused-argument
+        """Wait (asynchronously) until the next request is allowed."""
+        wait_time = self._reserve()
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
+    def record(self, url=None, status=None, **kwargs):
+        """Ignored: the rate of a TokenBucket is fixed."""
+
+    def record_response(self, response, latency=None):
+        """Ignored: the rate of a TokenBucket is fixed."""
+
+
+class AdaptiveRateLimiter:  # pylint: disable=too-many-instance-attributes
+    """Rate limiter that adapts the rate per host to the server (AIMD).
+
+    Every host starts at the initial rate. After each successful response
+    the rate is increased by a fixed step (additive increase), up to
+    max_rate; after a response with status 429 or 5xx, a failed request
+    (e.g. a timeout) or a slow response the rate is multiplied by a factor
+    below one (multiplicative decrease), down to min_rate. A Retry-After
+    header stops all requests to the host for that time. This way the rate
+    settles at the highest rate the server tolerates.
+
+    Parameters
+    ----------
+    rate: float
+        Initial number of requests per second for each host.
+    min_rate: float, optional
+        Lowest rate, by default a tenth of the initial rate.
+    max_rate: float, optional
+        Highest rate, by default the initial rate: the limiter then only
+        slows down when the server has problems and recovers afterwards.
+        Set it higher to let the limiter find the highest tolerated rate.
+    increase: float, optional
+        Increase of the rate after a successful response, by default a
+        tenth of the initial rate.
+    decrease: float, default=0.5
+        Factor of the rate after a failure. The rate is decreased at most
+        once per interval between requests, so that a burst of failures of
+        concurrent requests counts as one.
+    jitter: float, default=0
+        Randomly lengthen each interval by up to this fraction, so that the
+        requests are not evenly spaced.
+    slow_after: float, optional
+        Responses that take longer than this many seconds count as
+        failures. By default the response time is not used.
+    """
+
+    # pylint: disable-msg=too-many-arguments
+    def __init__(self, rate, *, min_rate=None, max_rate=None, increase=None,
+                 decrease=0.5, jitter=0, slow_after=None):
+        if rate <= 0:
+            raise ValueError("The rate of a rate limiter should be positive.")
+        self.rate = rate
+        self.min_rate = rate / 10 if min_rate is None else min_rate
+        self.max_rate = rate if max_rate is None else max_rate
+        self.increase = rate / 10 if increase is None else increase
+        self.decrease = decrease
+        self.jitter = jitter
+        self.slow_after = slow_after
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_min_wait(cls, min_wait, **kwargs):
+        """Create a limiter with one request every `min_wait` seconds.
+
+        Parameters
+        ----------
+        min_wait: float or None
+            Time between requests in seconds at the initial rate. If None
+            or not positive, requests are not throttled, but Retry-After
+            headers are still respected.
+        kwargs:
+            Other arguments of the AdaptiveRateLimiter.
+
+        Returns
+        -------
+        AdaptiveRateLimiter:
+            Limiter with an initial rate of 1/min_wait.
+        """
+        if min_wait is None or min_wait <= 0:
+            return cls(math.inf, **kwargs)
+        return cls(1 / min_wait, **kwargs)
+
+    def _host_state(self, url):
+        """State of the host of a url (the lock should be held)"""
+        host = "" if url is None else urlparse(str(url)).netloc
+        if host not in self._hosts:
+            self._hosts[host] = {"rate": self.rate, "next": 0.0,
+                                 "blocked_until": 0.0, "last_decrease": 0.0,
+                                 "successes": 0, "failures": 0}
+        return self._hosts[host]
+
+    def _reserve(self, url):
+        """Reserve the next slot for the host and return the time to wait."""
+        with self._lock:
+            state = self._host_state(url)
+            now = time.monotonic()
+            interval = 1 / state["rate"]
+            if self.jitter:
+                interval *= 1 + self.jitter * random()
+            start = max(now, state["next"], state["blocked_until"])
+            state["next"] = start + interval
+            return start - now
+
+    def acquire(self, url=None):
+        """Wait (blocking) until the next request to the host is allowed.
+
+        Parameters
+        ----------
+        url: str, optional
+            Url of the request, whose host determines the rate.
+        """
+        wait_time = self._reserve(url)
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    async def acquire_async(self, url=None):
+        """Wait (asynchronously) until the next request is allowed.
+
+        Parameters
+        ----------
+        url: str, optional
+            Url of the request, whose host determines the rate.
+        """
+        wait_time = self._reserve(url)
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
+    def record(self, url=None, status=None, *, error=False, retry_after=None,
+               latency=None):
+        """Adapt the rate of a host to the outcome of a request.
+
+        Parameters
+        ----------
+        url: str, optional
+            Url of the request.
+        status: int, optional
+            Status code of the response.
+        error: bool, default=False
+            Whether the request failed without a response (e.g. timeout).
+        retry_after: float, optional
+            Time in seconds that the server asked to wait.
+        latency: float, optional
+            Time in seconds that the request took.
+        """
+        congested = (error or status == 429
+                     or (status is not None and status >= 500)
+                     or (self.slow_after is not None and latency is not None
+                         and latency > self.slow_after))
+        with self._lock:
+            state = self._host_state(url)
+            now = time.monotonic()
+            if retry_after is not None and retry_after > 0:
+                state["blocked_until"] = max(state["blocked_until"],
+                                             now + retry_after)
+            if congested:
+                state["failures"] += 1
+                if now - state["last_decrease"] >= 1 / state["rate"]:
+                    state["rate"] = max(self.min_rate,
+                                        state["rate"] * self.decrease)
+                    state["last_decrease"] = now
+            elif status is None or status < 400:
+                state["successes"] += 1
+                state["rate"] = min(self.max_rate,
+                                    state["rate"] + self.increase)
+
+    def record_response(self, response, latency=None):
+        """Adapt the rate of a host to a response.
+
+        Parameters
+        ----------
+        response: requests.Response or httpx.Response
+            Response of the server.
+        latency: float, optional
+            Time in seconds that the request took.
+        """
+        self.record(str(response.url), response.status_code,
+                    retry_after=parse_retry_after(
+                        response.headers.get("Retry-After")),
+                    latency=latency)
+
+    def current_rate(self, url=None):
+        """float: Current number of requests per second for the host."""
+        with self._lock:
+            return self._host_state(url)["rate"]
+
+    @property
+    def stats(self):
+        """dict: Per host the current rate, successes and failures."""
+        with self._lock:
+            return {host: {key: state[key]
+                           for key in ["rate", "successes", "failures"]}
+                    for host, state in self._hosts.items()}
+
+
+def parse_retry_after(value):
+    """Parse the value of a Retry-After header.
+
+    Parameters
+    ----------
+    value: str
+        Number of seconds or an HTTP date.
+
+    Returns
+    -------
+    float:
+        Time to wait in seconds, or None if there is no (valid) value.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_time = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_time.timestamp() - time.time())
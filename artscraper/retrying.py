@@ -0,0 +1,330 @@
+"""Retry failed calls, but only when retrying can help.
+
+RetryPolicy: Call a function (or coroutine function) until it succeeds,
+waiting exponentially longer between attempts. Errors are classified as
+retryable (timeouts, dropped connections, 429 and 5xx responses) or fatal
+(e.g. a painting that cannot be found, 404), and fatal errors are not
+retried.
+RetryBudget: Limit the retries of all calls together to a fraction of the
+calls, so that a failing source doesn't keep the workers busy with
+retries.
+RetryResult: Outcome of a call: the value, or the error and all attempts.
+"""
+
+import asyncio
+import threading
+import time
+from random import random
+
+from artscraper.ratelimit import parse_retry_after
+
+#: Status codes of HTTP responses for which a retry can succeed.
+RETRYABLE_STATUS = frozenset([408, 425, 429, 500, 502, 503, 504])
+
+#: Errors that are not retried, even if they are of a retryable type.
+DEFAULT_FATAL = (ValueError, KeyError, TypeError, FileNotFoundError,
+                 PermissionError, NotImplementedError)
+
+
+def _transport_errors():
+    """Exception types for failed connections and transfers"""
+    try:
+        import httpx  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return (OSError, TimeoutError)
+    return (OSError, TimeoutError, httpx.TransportError)
+
+
+def _status_code(error):
+    """Status code of the HTTP response of an error, or None"""
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+class RetryResult:
+    """Outcome of a call with retries.
+
+    Attributes
+    ----------
+    value:
+        Return value of the function, None if it failed.
+    error: Exception
+        Error of the last attempt, None if the call succeeded.
+    errors: list[Exception]
+        Errors of all failed attempts.
+    attempts: int
+        Number of times the function was called.
+    elapsed: float
+        Time in seconds spent on the call, including waits.
+    retryable: bool
+        Whether the last error was retryable, i.e. the call gave up because
+        the attempts or the budget ran out, not because of a fatal error.
+    """
+
+    # pylint: disable-msg=too-many-arguments
+    def __init__(self, value=None, error=None, *, errors=None, attempts=0,
+                 elapsed=0.0, retryable=False):
+        self.value = value
+        self.error = error
+        self.errors = [] if errors is None else errors
+        self.attempts = attempts
+        self.elapsed = elapsed
+        self.retryable = retryable
+
+    @property
+    def ok(self):  # pylint: disable=invalid-name
+        """bool: Whether the call succeeded."""
+        return self.error is None
+
+    def unwrap(self):
+        """Get the value, or raise the error of the last attempt.
+
+        Returns
+        -------
+        Return value of the function.
+        """
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def __repr__(self):
+        if self.ok:
+            return (f"RetryResult(value={self.value!r}, "
+                    f"attempts={self.attempts})")
+        return (f"RetryResult(error={self.error!r}, attempts={self.attempts}, "
+                f"retryable={self.retryable})")
+
+
+class RetryBudget:
+    """Limit on the number of retries of many calls together.
+
+    Every call adds `ratio` retries to the budget, and every retry uses one.
+    Besides that, `min_retries` retries are always available, so that a few
+    early failures can be retried.
+
+    Parameters
+    ----------
+    ratio: float, default=0.2
+        Number of retries allowed per call.
+    min_retries: int, default=10
+        Number of retries that is allowed regardless of the ratio.
+    """
+
+    def __init__(self, ratio=0.2, min_retries=10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.calls = 0
+        self.retries = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def record_call(self):
+        """Add a (first) call to the budget."""
+        with self._lock:
+            self.calls += 1
+
+    def try_retry(self):
+        """Take a retry from the budget, if there is one left.
+
+        Returns
+        -------
+        bool:
+            Whether the retry is allowed.
+        """
+        with self._lock:
+            if self.retries < self.min_retries + self.ratio * self.calls:
+                self.retries += 1
+                return True
+            self.rejected += 1
+            return False
+
+    @property
+    def stats(self):
+        """dict: Number of calls, retries and rejected retries."""
+        with self._lock:
+            return {"calls": self.calls, "retries": self.retries,
+                    "rejected": self.rejected}
+
+
+class RetryPolicy:  # pylint: disable=too-many-instance-attributes
+    """Policy for retrying failed calls with exponential back-off.
+
+    The wait before retry n (1, 2, ...) is a random time between 0 and
+    `base_delay * multiplier**(n-1)` (at most `max_delay`), or longer if the
+    server asked to wait with a Retry-After header.
+
+    Errors are fatal if they are of one of the `fatal` types, or have an
+    HTTP response (e.g. requests.HTTPError, httpx.HTTPStatusError) with a
+    status code that is not in RETRYABLE_STATUS. Otherwise errors are
+    retryable if they are of one of the `retryable` types, and fatal if not.
+
+    Parameters
+    ----------
+    max_attempts: int, default=3
+        Maximum number of times a function is called.
+    base_delay: float, default=1
+        Maximum wait in seconds before the first retry.
+    max_delay: float, default=60
+        Maximum wait in seconds before any retry.
+    multiplier: float, default=2
+        Factor by which the maximum wait grows with every retry.
+    jitter: float, default=1
+        Fraction of the wait that is random: 1 waits between 0 and the
+        maximum (full jitter), 0 always waits the maximum.
+    retryable: tuple of types, optional
+        Errors that are retried, by default timeouts and connection errors
+        (OSError, TimeoutError and httpx.TransportError).
+    fatal: tuple of types, optional
+        Errors that are never retried, by default DEFAULT_FATAL, which
+        includes the ValueError of a painting that cannot be found.
+    budget: RetryBudget, optional
+        Budget shared by all calls through this policy (and other policies
+        with the same budget). By default a new RetryBudget; use None for
+        no limit.
+    """
+
+    _NO_BUDGET = object()
+
+    # pylint: disable-msg=too-many-arguments
+    def __init__(self, max_attempts=3, base_delay=1, *, max_delay=60,
+                 multiplier=2, jitter=1, retryable=None, fatal=None,
+                 budget=_NO_BUDGET):
+        if max_attempts < 1:
+            raise ValueError("A retry policy needs at least one attempt.")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retryable = _transport_errors() if retryable is None else retryable
+        self.fatal = DEFAULT_FATAL if fatal is None else fatal
+        if budget is RetryPolicy._NO_BUDGET:
+            budget = RetryBudget()
+        self.budget = budget
+
+    def is_retryable(self, error):
+        """Classify an error.
+
+        Parameters
+        ----------
+        error: Exception
+            Error raised by the function.
+
+        Returns
+        -------
+        bool:
+            Whether retrying can help.
+        """
+        if isinstance(error, self.fatal):
+            return False
+        status = _status_code(error)
+        if status is not None:
+            return status in RETRYABLE_STATUS
+        return isinstance(error, self.retryable)
+
+    def delay(self, attempt, error=None):
+        """Time to wait before the next attempt.
+
+        Parameters
+        ----------
+        attempt: int
+            Number of the attempt that failed (1, 2, ...).
+        error: Exception, optional
+            Error of the failed attempt, whose Retry-After header (if any)
+            is honoured.
+
+        Returns
+        -------
+        float:
+            Waiting time in seconds.
+        """
+        max_wait = min(self.max_delay,
+                       self.base_delay * self.multiplier**(attempt - 1))
+        wait_time = max_wait * (1 - self.jitter * random())
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers is not None:
+            retry_after = parse_retry_after(headers.get("Retry-After"))
+            if retry_after is not None:
+                wait_time = max(wait_time, min(retry_after, self.max_delay))
+        return wait_time
+
+    def _next_wait(self, result, error):
+        """Record a failed attempt and return the wait, or None to stop."""
+        result.errors.append(error)
+        result.error = error
+        result.retryable = self.is_retryable(error)
+        if (not result.retryable or result.attempts >= self.max_attempts
+                or (self.budget is not None and not self.budget.try_retry())):
+            return None
+        return self.delay(result.attempts, error)
+
+    def call(self, function, *args, **kwargs):
+        """Call a function until it succeeds or the retries run out.
+
+        Parameters
+        ----------
+        function: callable
+            Function to call.
+        args, kwargs:
+            Arguments of the function.
+
+        Returns
+        -------
+        RetryResult:
+            The value of the function, or the errors if it failed.
+        """
+        # Errors are classified and stored in the result.
+        # pylint: disable=broad-except
+        start = time.monotonic()
+        result = RetryResult()
+        if self.budget is not None:
+            self.budget.record_call()
+        while True:
+            result.attempts += 1
+            try:
+                result.value = function(*args, **kwargs)
+                result.error = None
+                break
+            except Exception as error:
+                wait_time = self._next_wait(result, error)
+                if wait_time is None:
+                    break
+                time.sleep(wait_time)
+        result.elapsed = time.monotonic() - start
+        return result
+
+    async def call_async(self, function, *args, **kwargs):
+        """Await a coroutine function until it succeeds or the retries run out.
+
+        Parameters
+        ----------
+        function: coroutine function
+            Function to call, e.g. AsyncWikiArtScraper.get_metadata.
+        args, kwargs:
+            Arguments of the function.
+
+        Returns
+        -------
+        RetryResult:
+            The value of the function, or the errors if it failed.
+        """
+        # Errors are classified and stored in the result.
+        # pylint: disable=broad-except
+        start = time.monotonic()
+        result = RetryResult()
+        if self.budget is not None:
+            self.budget.record_call()
+        while True:
+            result.attempts += 1
+            try:
+                result.value = await function(*args, **kwargs)
+                result.error = None
+                break
+            except Exception as error:
+                wait_time = self._next_wait(result, error)
+                if wait_time is None:
+                    break
+                await asyncio.sleep(wait_time)
+        result.elapsed = time.monotonic() - start
+        return result
@@ -0,0 +1,127 @@
+"""Validators for revalidating downloaded files with the server.
+
+For every downloaded file the ETag, Last-Modified, size and hash are
+stored in a file validators.json in the same directory. On a refresh,
+these are used for conditional requests, so that only files that changed
+have to be downloaded again.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Scrapers in different threads can store validators in the same file.
+_STORE_LOCK = threading.Lock()
+
+
+def validators_fp(fp):
+    """pathlib.Path: File with the validators for the files next to fp."""
+    return Path(Path(fp).parent, "validators.json")
+
+
+def load_validators(fp):
+    """Load the stored validators of a file.
+
+    Parameters
+    ----------
+    fp: str or Path
+        File that was downloaded.
+
+    Returns
+    -------
+    dict:
+        Validators of the file (etag, last_modified, size, sha256), empty if
+        none were stored.
+    """
+    try:
+        with open(validators_fp(fp), "r", encoding="utf-8") as f:
+            return json.load(f).get(Path(fp).name, {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def store_validators(fp, headers=None, validators=None):
+    """Store the validators of a file after downloading it.
+
+    Parameters
+    ----------
+    fp: str or Path
+        File that was downloaded.
+    headers: dict, optional
+        Headers of the response, from which the ETag and Last-Modified
+        are taken.
+    validators: dict, optional
+        Previously stored validators, that are kept if the response did not
+        include new ones.
+
+    Returns
+    -------
+    dict:
+        The new validators of the file.
+    """
+    new_validators = dict(validators or {})
+    if headers is not None:
+        for header, name in [("ETag", "etag"),
+                             ("Last-Modified", "last_modified")]:
+            if headers.get(header) is not None:
+                new_validators[name] = headers.get(header)
+    new_validators["size"] = Path(fp).stat().st_size
+    new_validators["sha256"] = file_hash(fp)
+    new_validators["checked"] = time.time()
+
+    with _STORE_LOCK:
+        try:
+            with open(validators_fp(fp), "r", encoding="utf-8") as f:
+                all_validators = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            all_validators = {}
+        all_validators[Path(fp).name] = new_validators
+        _write_atomic(validators_fp(fp), all_validators)
+    return new_validators
+
+
+def _write_atomic(fp, data):
+    """Write JSON to a temporary file and rename it into place"""
+    fd, tmp_fp = tempfile.mkstemp(dir=Path(fp).parent, prefix=Path(fp).name,
+                                  suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_fp, fp)
+    except BaseException:
+        os.unlink(tmp_fp)
+        raise
+
+
+def conditional_headers(validators):
+    """Headers for a conditional request from stored validators.
+
+    Parameters
+    ----------
+    validators: dict
+        Validators as returned by load_validators.
+
+    Returns
+    -------
+    dict:
+        If-None-Match and/or If-Modified-Since headers.
+    """
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def file_hash(fp, chunk_size=2**16):
+    """str: SHA-256 hex digest of the contents of a file."""
+    sha = hashlib.sha256()
+    with open(fp, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
@@ -0,0 +1,530 @@
+"""Pooled keep-alive HTTP sessions shared between scrapers.
+
+Opening a new TCP+TLS connection for every API call or image download
+is often more expensive than the payload itself. The SessionPool keeps
+one pooled session per host, so that repeated requests to the same host
+reuse their connections.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from artscraper.ratelimit import parse_retry_after
+
+try:
+    import brotli  # pylint: disable=unused-import
+    _ENCODINGS = "gzip, deflate, br"
+except ImportError:
+    _ENCODINGS = "gzip, deflate"
+
+
+class SessionPool:
+    """Pool of keep-alive HTTP sessions, one per host.
+
+    The same pool can be shared by several scrapers (also across threads),
+    e.g. by supplying it as the `session_pool` argument of the
+    WikiArtScraper.
+
+    Parameters
+    ----------
+    pool_size: int, default=10
+        Maximum number of kept-alive connections per host.
+    compression: bool, default=True
+        If true, ask the server for compressed (gzip/deflate/brotli) bodies.
+    http2: bool, default=False
+        Use HTTP/2 instead of HTTP/1.1. This needs the optional `httpx`
+        package with HTTP/2 support (pip install artscraper[http2]).
+    timeout: float, optional
+        Default timeout for requests in seconds.
+    headers: dict, optional
+        Extra headers to send with every request.
+    """
+
+    def __init__(self, pool_size=10, compression=True, http2=False,
+                 timeout=None, headers=None):
+        if http2:
+            try:
+                import httpx  # pylint: disable=import-outside-toplevel
+            except ImportError as error:
+                raise ImportError("HTTP/2 support needs the httpx package: "
+                                  "pip install artscraper[http2]") from error
+            self._httpx = httpx
+        else:
+            self._httpx = None
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.headers = {
+            "Accept-Encoding": _ENCODINGS if compression else "identity"}
+        if headers is not None:
+            self.headers.update(headers)
+
+        self._sessions = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _exc_type, _exc_val, _exc_tb):
+        self.close()
+
+    @property
+    def http2(self):
+        """bool: Whether the sessions use HTTP/2."""
+        return self._httpx is not None
+
+    def session(self, url):
+        """Get the pooled session for the host of an url.
+
+        Parameters
+        ----------
+        url: str
+            Any url on the host.
+
+        Returns
+        -------
+        requests.Session or httpx.Client:
+            Session that keeps the connections to the host alive.
+        """
+        host = _host(url)
+        with self._lock:
+            if host not in self._sessions:
+                self._sessions[host] = self._new_session(host)
+                self._counters[host] = {"requests": 0, "connections": 0}
+            return self._sessions[host]
+
+    def _new_session(self, host):
+        if self._httpx is not None:
+            limits = self._httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size)
+            return self._httpx.Client(http2=True, limits=limits,
+                                      headers=self.headers,
+                                      follow_redirects=True)
+        session = requests.Session()
+        adapter = _CountingAdapter(lambda: self._count_connection(host),
+                                   pool_connections=1,
+                                   pool_maxsize=self.pool_size,
+                                   pool_block=False)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(self.headers)
+        return session
+
+    # pylint: disable=too-many-arguments
+    def get(self, url, params=None, headers=None, timeout=None, stream=False,
+            *, rate_limiter=None):
+        """Do a GET request through the pooled session of the host.
+
+        Parameters
+        ----------
+        url: str
+            Url to get.
+        params: dict, optional
+            Query parameters.
+        headers: dict, optional
+            Extra headers for this request only.
+        timeout: float, optional
+            Timeout in seconds, by default the timeout of the pool.
+        stream: bool, default=False
+            If true, do not read the body yet; use `iter_chunks` to read it
+            and close the response when done.
+        rate_limiter: TokenBucket or AdaptiveRateLimiter, optional
+            Rate limiter to wait for before the request, which is told the
+            outcome (status, Retry-After, response time or failure).
+
+        Returns
+        -------
+        requests.Response or httpx.Response:
+            The response of the server.
+        """
+        if rate_limiter is None:
+            return self._get(url, params, headers, timeout, stream)
+        rate_limiter.acquire(url)
+        start = time.monotonic()
+        try:
+            response = self._get(url, params, headers, timeout, stream)
+        except self.transport_errors:
+            rate_limiter.record(url, error=True)
+            raise
+        rate_limiter.record(
+            url, response.status_code, latency=time.monotonic() - start,
+            retry_after=parse_retry_after(response.headers.get("Retry-After")))
+        return response
+
+    # pylint: disable=too-many-arguments
+    def _get(self, url, params, headers, timeout, stream):
+        session = self.session(url)
+        host = _host(url)
+        if timeout is None:
+            timeout = self.timeout
+        if self._httpx is not None:
+            return self._httpx_get(session, host, url, stream=stream,
+                                   params=params, headers=headers,
+                                   timeout=timeout)
+        response = session.get(url, params=params, headers=headers,
+                               timeout=timeout, stream=stream)
+        with self._lock:
+            self._counters[host]["requests"] += 1
+        return response
+
+    def _count_connection(self, host):
+        """Count a newly opened connection to a host"""
+        with self._lock:
+            if host in self._counters:
+                self._counters[host]["connections"] += 1
+
+    def _httpx_get(self, client, host, url, stream, **kwargs):
+        def _trace(event_name, _info):
+            if event_name == "connection.connect_tcp.complete":
+                self._count_connection(host)
+
+        request = client.build_request(
+            "GET", url, extensions={"trace": _trace}, **kwargs)
+        response = client.send(request, stream=stream)
+        with self._lock:
+            self._counters[host]["requests"] += 1
+        return response
+
+    @property
+    def transport_errors(self):
+        """tuple: Exception types for failed connections and transfers."""
+        if self._httpx is None:
+            return (OSError, )
+        return (OSError, self._httpx.TransportError)
+
+    # pylint: disable=too-many-arguments
+    def download(self, url, fp, *, timeout=None, chunk_size=2**16,
+                 max_resumes=3, headers=None):
+        """Download a file in chunks, atomically and resumable.
+
+        The body is streamed to a temporary file next to the destination
+        (with the suffix .part), which is renamed to the destination only
+        after the whole file has been received. Interrupted transfers are
+        resumed with a HTTP Range request, also if a .part file was left
+        behind by an earlier run. The validator (ETag or Last-Modified) of
+        the partial file is stored next to it (.part.json) and sent as
+        If-Range, so that a file that changed in the meantime is downloaded
+        again from the start instead of being spliced onto the old part.
+
+        Parameters
+        ----------
+        url: str
+            Url of the file.
+        fp: str or Path
+            Destination of the file.
+        timeout: float, optional
+            Timeout in seconds, by default the timeout of the pool.
+        chunk_size: int, default=65536
+            Number of bytes to read and write at a time.
+        max_resumes: int, default=3
+            Maximum number of times to resume an interrupted transfer.
+        headers: dict, optional
+            Extra headers, e.g. for a conditional request (If-None-Match).
+
+        Returns
+        -------
+        dict:
+            Headers of the response, or None if the server replied that the
+            file was not modified (304), in which case nothing is written.
+        """
+        part = PartialDownload(fp)
+        for _ in range(max_resumes + 1):
+            try:
+                complete, response_headers = self._download_part(
+                    url, part, timeout, chunk_size, headers)
+            except requests.HTTPError:
+                raise
+            except self.transport_errors:
+                continue
+            if response_headers is None:
+                return None
+            if complete:
+                return response_headers
+        raise IOError(f"Download of {url} was interrupted too many times.")
+
+    def _download_part(self, url, part, timeout, chunk_size, extra_headers):
+        """Continue a download, returns whether it is complete + headers"""
+        # pylint: disable=too-many-arguments
+        response = self.get(url, headers=part.request_headers(extra_headers),
+                            timeout=timeout, stream=True)
+        try:
+            if response.status_code == 304:
+                return False, None
+            if part.offset and response.status_code == 416:
+                # Nothing left to get, but we can't verify the size.
+                part.discard()
+                return False, response.headers
+            response.raise_for_status()
+            mode = part.start(response.status_code, response.headers)
+            if mode is None:
+                return False, response.headers
+            with open(part.part_fp, mode) as f:
+                for chunk in iter_chunks(response, chunk_size):
+                    f.write(chunk)
+        finally:
+            response.close()
+        return part.finish(), response.headers
+
+    @property
+    def stats(self):
+        """dict: Connection reuse counters per host.
+
+        For each host the number of requests, the number of newly opened
+        connections and the number of requests that reused a connection.
+        """
+        stats = {}
+        with self._lock:
+            for host in self._sessions:
+                counters = dict(self._counters[host])
+                counters["reused"] = max(
+                    0, counters["requests"] - counters["connections"])
+                stats[host] = counters
+        return stats
+
+    def close(self):
+        """Close all sessions and their connections."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+            self._counters = {}
+
+
+class PartialDownload:
+    """Bookkeeping of a download that can be resumed.
+
+    The body is written to a temporary file next to the destination (with
+    the suffix .part), together with the validator (ETag or Last-Modified)
+    of the file it belongs to (.part.json). This is used by
+    SessionPool.download, and can be used with any HTTP client. A 416
+    response to a resumed request (offset > 0) means the part can't be
+    completed, and it should be discarded:
+
+    >>> part = PartialDownload("image.jpg")
+    >>> response = client.get(url, headers=part.request_headers())
+    >>> response.raise_for_status()
+    >>> mode = part.start(response.status_code, response.headers)
+    >>> if mode is not None:
+    ...     with open(part.part_fp, mode) as f:
+    ...         f.write(response.content)
+    ...     complete = part.finish()
+
+    Parameters
+    ----------
+    fp: str or Path
+        Destination of the file.
+    """
+
+    def __init__(self, fp):
+        self.fp = Path(fp)
+        self.part_fp = Path(self.fp.parent, self.fp.name + ".part")
+        self.offset = 0
+        self.validator = None
+        self.total_size = None
+
+    def request_headers(self, extra_headers=None):
+        """Headers to request (the rest of) the file with.
+
+        Parameters
+        ----------
+        extra_headers: dict, optional
+            Extra headers, e.g. for a conditional request (If-None-Match).
+
+        Returns
+        -------
+        dict:
+            The headers, with a Range and If-Range header if the download
+            can be resumed.
+        """
+        self.offset = (self.part_fp.stat().st_size
+                       if self.part_fp.is_file() else 0)
+        self.validator = (_read_part_validator(self.part_fp)
+                          if self.offset else None)
+        if self.validator is None:
+            # Without a validator the part can't be matched to the file.
+            self.offset = 0
+        # The length and ranges should refer to the bytes of the file itself.
+        headers = {"Accept-Encoding": "identity", **(extra_headers or {})}
+        if self.offset:
+            headers["Range"] = f"bytes={self.offset}-"
+            headers["If-Range"] = self.validator
+        return headers
+
+    def start(self, status_code, headers):
+        """Check a successful response before writing its body.
+
+        Parameters
+        ----------
+        status_code: int
+            Status code of the response, e.g. 200 or 206.
+        headers: Mapping
+            Headers of the response.
+
+        Returns
+        -------
+        str:
+            Mode to open the part file with ("ab" to append, "wb" to start
+            over), or None if the response can't be used and the part was
+            discarded, in which case the download should be requested again.
+        """
+        if (self.offset and status_code == 206
+                and _range_validator(headers) != self.validator):
+            # The file changed, and the server ignored If-Range.
+            self.discard()
+            return None
+        if status_code != 206:
+            self.offset = 0
+            _write_part_validator(self.part_fp, headers)
+        self.total_size = _total_size(headers, self.offset)
+        return "ab" if self.offset else "wb"
+
+    def finish(self):
+        """Move the file in place if it is complete.
+
+        Returns
+        -------
+        bool:
+            Whether the download is complete; if not it should be resumed.
+        """
+        size = self.part_fp.stat().st_size
+        if self.total_size is not None and size > self.total_size:
+            self.discard()
+            return False
+        if self.total_size is not None and size < self.total_size:
+            return False
+        os.replace(self.part_fp, self.fp)
+        _unlink(_part_validator_fp(self.part_fp))
+        return True
+
+    def discard(self):
+        """Remove the partial download and its validator."""
+        _unlink(self.part_fp)
+        _unlink(_part_validator_fp(self.part_fp))
+
+
+def iter_chunks(response, chunk_size=2**16):
+    """Iterate over the body of a streamed response.
+
+    Works for responses from both the requests and httpx backends.
+
+    Parameters
+    ----------
+    response: requests.Response or httpx.Response
+        Response obtained with `SessionPool.get(..., stream=True)`.
+    chunk_size: int, default=65536
+        Number of bytes per chunk.
+
+    Returns
+    -------
+    Iterator[bytes]:
+        Chunks of the (decompressed) body.
+    """
+    if hasattr(response, "iter_content"):
+        return response.iter_content(chunk_size=chunk_size)
+    return response.iter_bytes(chunk_size=chunk_size)
+
+
+def _total_size(headers, offset):
+    """Size of the complete file from the Content-Range/Length headers"""
+    content_range = headers.get("Content-Range")
+    if content_range is not None and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return None if total == "*" else int(total)
+    content_length = headers.get("Content-Length")
+    if content_length is None:
+        return None
+    return offset + int(content_length)
+
+
+def _range_validator(headers):
+    """Strong validator for If-Range (ETag or Last-Modified), or None"""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def _part_validator_fp(part_fp):
+    return Path(part_fp.parent, part_fp.name + ".json")
+
+
+def _read_part_validator(part_fp):
+    """Validator of the file that a partial download belongs to"""
+    try:
+        with open(_part_validator_fp(part_fp), "r", encoding="utf-8") as f:
+            return json.load(f).get("validator")
+    except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+        return None
+
+
+def _write_part_validator(part_fp, headers):
+    """Store the validator of the file that is being downloaded"""
+    validator_fp = _part_validator_fp(part_fp)
+    validator = _range_validator(headers)
+    if validator is None:
+        _unlink(validator_fp)
+        return
+    with open(validator_fp, "w", encoding="utf-8") as f:
+        json.dump({"validator": validator}, f)
+
+
+def _unlink(fp):
+    try:
+        fp.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _host(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter that reports every connection it opens.
+
+    Also reconnects of dropped keep-alive connections are reported, which
+    the counters of urllib3 itself leave out.
+    """
+
+    def __init__(self, on_connect, **kwargs):
+        self._on_connect = on_connect
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _counting_pool_classes(
+            self._on_connect)
+
+
+def _counting_pool_classes(on_connect):
+    """urllib3 pool classes whose connections call on_connect"""
+
+    class _HTTPConnection(HTTPConnection):
+        def connect(self):
+            super().connect()
+            on_connect()
+
+    class _HTTPSConnection(HTTPSConnection):
+        def connect(self):
+            # HTTPSConnection is a placeholder class if ssl is unavailable.
+            super().connect()  # pylint: disable=no-member
+            on_connect()
+
+    class _HTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = _HTTPConnection
+
+    class _HTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = _HTTPSConnection
+
+    return {"http": _HTTPConnectionPool, "https": _HTTPSConnectionPool}
@@ -0,0 +1,193 @@
+"""Fetch full resolution images from a tiled image pyramid.
+
+Viewers such as the one of Google Arts & Culture load images as a pyramid
+of tiles: a description of the pyramid (`<base_url>=g`) and for each zoom
+level a grid of tiles. Fetching the tiles of one level and stitching them
+together gives the image at that resolution, without browser screenshots.
+
+Google Arts & Culture itself signs its tile urls, so the urls of the tiles
+have to be given with a template, for a server that serves them unsigned
+(e.g. a mirror or a local tile cache).
+
+Decoding the tiles needs the optional Pillow package
+(pip install artscraper[tiles]).
+"""
+
+import io
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def get_tile_info(base_url, session_pool, timeout=None, rate_limiter=None):
+    """Get the description of the tile pyramid of an image.
+
+    Parameters
+    ----------
+    base_url: str
+        Url of the image, without any options (=...).
+    session_pool: SessionPool
+        Pool of HTTP sessions to request with.
+    timeout: float, optional
+        Timeout in seconds.
+    rate_limiter: AdaptiveRateLimiter or TokenBucket, optional
+        Rate limiter for the request.
+
+    Returns
+    -------
+    dict:
+        Tile width and height, and for each level (from the smallest to the
+        largest) the number of tiles and empty pixels in x and y.
+    """
+    response = session_pool.get(base_url + "=g", timeout=timeout,
+                                rate_limiter=rate_limiter)
+    response.raise_for_status()
+    return parse_tile_info(response.text)
+
+
+def parse_tile_info(xml_text):
+    """Parse the description (TileInfo XML) of a tile pyramid.
+
+    Parameters
+    ----------
+    xml_text: str
+        The XML document.
+
+    Returns
+    -------
+    dict:
+        See get_tile_info.
+    """
+    try:
+        root = ET.fromstring(xml_text)
+        levels = [{key: int(level.attrib.get(key, 0))
+                   for key in ["num_tiles_x", "num_tiles_y",
+                               "empty_pels_x", "empty_pels_y"]}
+                  for level in root.iter("pyramid_level")]
+        tile_info = {"tile_width": int(root.attrib["tile_width"]),
+                     "tile_height": int(root.attrib["tile_height"]),
+                     "levels": levels}
+    except (ET.ParseError, KeyError, ValueError) as error:
+        raise ValueError("Cannot parse the description of the tiles.") \
+            from error
+    if len(levels) == 0:
+        raise ValueError("The image has no tiles.")
+    return tile_info
+
+
+# pylint: disable=too-many-arguments,too-many-locals
+def fetch_tiled_image(base_url, session_pool, *, tile_url_template,
+                      zoom=None, max_workers=8, timeout=None,
+                      rate_limiter=None):
+    """Fetch all tiles of a zoom level and stitch them together.
+
+    Parameters
+    ----------
+    base_url: str
+        Url of the image, without any options (=...).
+    session_pool: SessionPool
+        Pool of HTTP sessions, through which the tiles are fetched
+        concurrently.
+    tile_url_template: str
+        Template for the urls of the tiles, with the fields base_url, x,
+        y and z, e.g. "{base_url}=x{x}-y{y}-z{z}".
+    zoom: int, optional
+        Zoom level, from 0 (smallest) upwards; negative values count from the
+        largest level. By default the largest level (full resolution).
+    max_workers: int, default=8
+        Number of tiles that are fetched at the same time.
+    timeout: float, optional
+        Timeout in seconds for each request.
+    rate_limiter: AdaptiveRateLimiter or TokenBucket, optional
+        Rate limiter for all requests, shared by the concurrent fetches.
+
+    Returns
+    -------
+    numpy.ndarray:
+        The image as an array of shape (height, width, 3) and type uint8.
+    """
+    tile_info = get_tile_info(base_url, session_pool, timeout=timeout,
+                              rate_limiter=rate_limiter)
+    levels = tile_info["levels"]
+    if zoom is None:
+        zoom = len(levels) - 1
+    elif zoom < 0:
+        zoom = len(levels) + zoom
+    if not 0 <= zoom < len(levels):
+        raise ValueError(f"Zoom level {zoom} does not exist, there are "
+                         f"{len(levels)} levels.")
+    level = levels[zoom]
+    tile_width = tile_info["tile_width"]
+    tile_height = tile_info["tile_height"]
+
+    def _fetch_tile(position):
+        tile_x, tile_y = position
+        url = tile_url_template.format(base_url=base_url, x=tile_x,
+                                       y=tile_y, z=zoom)
+        response = session_pool.get(url, timeout=timeout,
+                                    rate_limiter=rate_limiter)
+        response.raise_for_status()
+        return position, decode_image(response.content)
+
+    positions = [(tile_x, tile_y)
+                 for tile_y in range(level["num_tiles_y"])
+                 for tile_x in range(level["num_tiles_x"])]
+    image = np.zeros((level["num_tiles_y"] * tile_height,
+                      level["num_tiles_x"] * tile_width, 3), dtype=np.uint8)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for (tile_x, tile_y), tile in executor.map(_fetch_tile, positions):
+            # Tiles at the edges can be smaller than the tile size.
+            top, left = tile_y * tile_height, tile_x * tile_width
+            tile = tile[:tile_height, :tile_width]
+            image[top:top + tile.shape[0], left:left + tile.shape[1]] = tile
+
+    height = image.shape[0] - level["empty_pels_y"]
+    width = image.shape[1] - level["empty_pels_x"]
+    return image[:height, :width]
+
+
+def decode_image(data):
+    """Decode an encoded (JPEG/PNG/...) image into an RGB array.
+
+    Parameters
+    ----------
+    data: bytes
+        The encoded image.
+
+    Returns
+    -------
+    numpy.ndarray:
+        The image as an array of shape (height, width, 3) and type uint8.
+    """
+    image_module = _pil_image()
+    with image_module.open(io.BytesIO(data)) as img:
+        return np.asarray(img.convert("RGB"))
+
+
+def encode_png(image):
+    """Encode an RGB array as PNG.
+
+    Parameters
+    ----------
+    image: numpy.ndarray
+        Array of shape (height, width, 3) and type uint8.
+
+    Returns
+    -------
+    bytes:
+        The PNG image.
+    """
+    image_module = _pil_image()
+    buffer = io.BytesIO()
+    image_module.fromarray(image).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _pil_image():
+    try:
+        from PIL import Image  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise ImportError("Decoding image tiles needs the Pillow package: "
+                          "pip install artscraper[tiles]") from error
+    return Image
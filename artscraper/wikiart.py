@@ -1,22 +1,96 @@
 """Module for the WikiArt scraper class."""
 
+import hashlib
 import json
-import re
-import time
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
 from pathlib import Path
+from urllib.parse import urlencode
 from urllib.parse import urlparse
 
-import requests
-
 from artscraper.base import BaseArtScraper
+from artscraper.cache import PaintingIndex
+from artscraper.cache import SQLiteCache
+from artscraper.ratelimit import AdaptiveRateLimiter
+from artscraper.revalidate import conditional_headers
+from artscraper.revalidate import file_hash
+from artscraper.revalidate import load_validators
+from artscraper.revalidate import store_validators
+from artscraper.session import SessionPool
+from artscraper.session import iter_chunks
+from artscraper.wikiart_common import is_painting
+from artscraper.wikiart_common import page_missing
+from artscraper.wikiart_common import read_api_keys
+from artscraper.wikiart_common import scan_painting_id
+from artscraper.wikiart_common import search_terms
+from artscraper.wikiart_common import split_artwork_link
+
+
+class WikiArtScraper(BaseArtScraper):  # pylint: disable=too-many-instance-attributes
+    """Class to interact with the WikiArt API.
 
+    Parameters
+    ----------
+    output_dir: Path or str, optional
+        Output directory for any scraped images.
+    skip_existing: bool, default=True
+        If true, skip downloading any existing images.
+    min_wait: float, default=0.3
+        Minimum time between two requests to WikiArt in seconds. The time
+        is increased automatically if WikiArt has trouble keeping up.
+    timeout: float, default=150
+        Timeout for requests in seconds.
+    session_pool: SessionPool, optional
+        Pool of keep-alive HTTP sessions to use. It can be shared between
+        scrapers; if not supplied a new pool is created, which is closed
+        together with the scraper.
+    metadata_cache: LRUCache or SQLiteCache, optional
+        Cache of link -> metadata, see BaseArtScraper. If it is a
+        SQLiteCache, also the API searches, painting lookups and scraped
+        painting ids are stored in it, so that they are reused on restarts
+        and by other processes.
+    painting_index: PaintingIndex, optional
+        Index of (artist, painting) slugs to painting ids, which is filled
+        from all search results. Supply PaintingIndex("some_file.sqlite")
+        to keep it on disk; by default it is only kept in memory.
+    rate_limiter: AdaptiveRateLimiter or TokenBucket, optional
+        Rate limiter for all requests to WikiArt, by default an adaptive
+        one that starts at (and doesn't exceed) one request per min_wait
+        seconds, and slows down on errors. It can be shared with other
+        (asynchronous) scrapers, to keep them within one budget together.
+    hedged: bool, default=False
+        If true, search for the painting and scrape its page at the same
+        time, and use whichever finds the painting first. This lowers the
+        time to resolve a link, at the cost of more requests.
+    """
 
-class WikiArtScraper(BaseArtScraper):
-    """Class to interact with the WikiArt API."""
+    #: Maximum number of bytes of an artwork page to scan for the painting ID.
+    max_scrape_bytes = 2**20
 
-    def __init__(self, output_dir=None, skip_existing=True, min_wait=0.3, timeout=150):
-        super().__init__(output_dir, skip_existing, min_wait=min_wait)
+    # pylint: disable-msg=too-many-arguments
+    def __init__(self, output_dir=None, skip_existing=True, min_wait=0.3,
+                 timeout=150, session_pool=None, *, metadata_cache=None,
+                 painting_index=None, rate_limiter=None, hedged=False):
+        super().__init__(output_dir, skip_existing, min_wait=min_wait,
+                         metadata_cache=metadata_cache)
         self.timeout = timeout
+        self._own_pool = session_pool is None
+        if session_pool is None:
+            session_pool = SessionPool(timeout=timeout)
+        self.session_pool = session_pool
+        if painting_index is None:
+            painting_index = PaintingIndex()
+        self.painting_index = painting_index
+        if rate_limiter is None:
+            rate_limiter = AdaptiveRateLimiter.from_min_wait(min_wait)
+        self.rate_limiter = rate_limiter
+        self.hedged = hedged
+        self.strategy_stats = StrategyStats()
+        self._executor = None
+        # Stop event of the hedged strategy running in the current thread.
+        self._hedge = threading.local()
         self._get_API_keys()
 
         # Try to use the previous session, can be deleted if expired.
@@ -27,71 +101,79 @@ class WikiArtScraper(BaseArtScraper):
             self._new_session()
             with open(".wiki_session", "w", encoding="utf-8") as f:
                 f.write(self.session_key)
-        self.last_request = None
+
+    def __exit__(self, _exc_type, _exc_val, _exc_tb):
+        self.close()
 
     @property
     def paint_dir(self):
         metadata = self.get_metadata()
         return Path(self.output_dir, metadata["id"])
 
+    @property
+    def lookup_cache(self):
+        """SQLiteCache: Persistent store for API lookups, None if unused."""
+        if isinstance(self.metadata_cache, SQLiteCache):
+            return self.metadata_cache
+        return None
+
     def _get_API_keys(self):
         """Read the API secret/access key from the current directory
 
         If the file .wiki_api does not exist, ask for the access and secret
         keys.
         """
-        try:
-            with open(".wiki_api", "r", encoding="utf-8") as f:
-                self.API_access_key, self.API_secret_key, *_ = f.read().split(
-                    "\n")
-            return
-        except FileNotFoundError:
-            print("No API keys found in current directory.")
-            print("WikiArt API keys can be obtained from "
-                  "'https://www.wikiart.org/en/App/GetApi'.")
-            self.API_access_key = input("WikiArt Access Key? ")
-            self.API_secret_key = input("WikiArt Secret Key? ")
-
-            str_out = "\n".join([self.API_access_key, self.API_secret_key, ""])
-            with open(".wiki_api", "w", encoding="utf-8") as f:
-                f.write(str_out)
+        self.API_access_key, self.API_secret_key = read_api_keys()
 
     def _new_session(self):
         """Create a new session and store the session key"""
         login_page = "https://www.wikiart.org/en/Api/2/login"
-        response = requests.get(login_page,
-                                params={
-                                    "accessCode": self.API_access_key,
-                                    "secretCode": self.API_secret_key
-                                },
-                                timeout=self.timeout)
+        response = self.session_pool.get(login_page,
+                                         params={
+                                             "accessCode": self.API_access_key,
+                                             "secretCode": self.API_secret_key
+                                         },
+                                         timeout=self.timeout,
+                                         rate_limiter=self.rate_limiter)
+        response.raise_for_status()
         self.session_key = json.loads(response.text)["SessionKey"]
-        self.last_request = time.time()
 
-    def _get_content(self, url, params):
-        """Get data through the WikiArt API with rate limits"""
+    def _check_stopped(self):
+        """Stop a hedged strategy once another one found the painting"""
+        stop = getattr(self._hedge, "stop", None)
+        if stop is not None and stop.is_set():
+            raise _StrategyStopped("Another strategy found the painting.")
+
+    def _request(self, url, params, headers=None):
+        """Do a request to the WikiArt API with rate limits"""
+        self._check_stopped()
         params["authSessionKey"] = self.session_key
-        if self.last_request is not None:
-            time_elapsed = time.time() - self.last_request
-            if time_elapsed < self.min_wait:
-                time.sleep(self.min_wait - time_elapsed)
-        response = requests.get(url, params=params, timeout=self.timeout)
-        self.last_request = time.time()
+        return self.session_pool.get(url, params=params, headers=headers,
+                                     timeout=self.timeout,
+                                     rate_limiter=self.rate_limiter)
+
+    def _get_content(self, url, params):
+        """Get data through the WikiArt API with rate limits
+
+        Errors of the server (e.g. 429, 503) raise an HTTPError instead of
+        the ValueError of a painting that cannot be found.
+        """
+        response = self._request(url, params)
+        response.raise_for_status()
         return json.loads(response.text)
 
-    def _find_by_artist_painting(self):
-        """Find the painting by searching for artist + painting name"""
-        link_dirs = _link_dirs(self.link)
-        terms = " ".join(link_dirs).replace("-", " ")
-        try:
-            int(terms[-4:])
-            terms = terms[:-5]
-        except ValueError:
-            pass
+    def _find_by_index(self, link):
+        """Find the painting id in the index of paintings seen before"""
+        link_dirs = split_artwork_link(link)
+        paint_id = self.painting_index.get(*link_dirs)
+        if paint_id is None:
+            raise ValueError("Cannot find painting in the index.")
+        return self._check_metadata(paint_id, link_dirs)
 
-        url = "https://www.wikiart.org/en/api/2/PaintingSearch"
-        params = {"term": terms}
-        meta_data = self._get_content(url, params)
+    def _find_by_artist_painting(self, link):
+        """Find the painting by searching for artist + painting name"""
+        link_dirs = split_artwork_link(link)
+        meta_data = self._search({"term": search_terms(link_dirs)})
         painting_list = meta_data["data"]
         for paint_meta in painting_list:
             try:
@@ -101,21 +183,33 @@ class WikiArtScraper(BaseArtScraper):
 
         raise ValueError("Cannot find painting by artist + painting")
 
-    def _find_by_scrape(self):
-        """This is a nasty bit of regex to get the painting ID"""
-        link_dirs = _link_dirs(self.link)
-        response = requests.get(self.link, timeout=self.timeout)
-        # We try two different regexes to get the painting ID.
-        p_rgx = re.compile(r"paintingId = '(.+?')")
-        try:
-            paint_id = p_rgx.search(response.text).group(0)[14:-1]
-        except AttributeError:
+    def _find_by_scrape(self, link):
+        """Find the painting ID by scraping the artwork page"""
+        link_dirs = split_artwork_link(link)
+        key = "scrape:" + link
+        paint_id = None
+        if self.lookup_cache is not None:
+            paint_id = self.lookup_cache.get_response(key)
+        if paint_id is None:
+            self._check_stopped()
+            response = self.session_pool.get(link, timeout=self.timeout,
+                                             stream=True,
+                                             rate_limiter=self.rate_limiter)
             try:
-                p_rgx = re.compile(r'data-painting-id="(.+?)"')
-                paint_id = p_rgx.search(response.text).group(0)[18:-1]
-            except AttributeError as error:
-                raise ValueError("Cannot find painting by scrape.") from error
-        return self._check_metadata(paint_id, link_dirs)
+                if page_missing(response.status_code):
+                    raise ValueError("Cannot find painting by scrape.")
+                response.raise_for_status()
+                # Stop reading (and drop the connection) once found.
+                paint_id = scan_painting_id(
+                    iter_chunks(response, chunk_size=2**14),
+                    self.max_scrape_bytes)
+            finally:
+                response.close()
+        metadata = self._check_metadata(paint_id, link_dirs)
+        # Only store IDs that belong to the link.
+        if self.lookup_cache is not None:
+            self.lookup_cache.put_response(key, paint_id)
+        return metadata
 
     def _check_metadata(self, paint_meta, link_dirs):
         """Get the meta data from a painting with validation"""
@@ -124,77 +218,405 @@ class WikiArtScraper(BaseArtScraper):
         else:
             paint_id = paint_meta["id"]
         paint_data = self.info_from_painting_id(paint_id)
-        if (paint_data["artistUrl"] == link_dirs[0]
-                and paint_data["url"] == link_dirs[1]):
+        if is_painting(paint_data, link_dirs):
             return paint_data
         raise ValueError("Painting is not the right one.")
 
-    def _find_by_artist(self):
-        """Get the meta data by searching for all paintings by the artist
+    def _find_by_artist(self, link):
+        """Get the meta data by going through all paintings by the artist
 
-        This is generally very slow, since a request for each of the paintings
-        has to be made. It also has the problem that it seems like the
-        pagination tokens do not work, so this method doesn't always work for
-        artists with a lot of artworks, since higher page numbers are
-        inaccessible.
+        The pages with paintings by the artist are requested one at a time,
+        until the painting is found. If the whole catalogue of the artist
+        was indexed before, the index is used instead.
         """
-        url = "https://www.wikiart.org/en/api/2/PaintingSearch"
-        link_dirs = _link_dirs(self.link)
-        artist = link_dirs[0].replace("-", " ")
-        has_more = True
-        meta_data = []
-        params = {"term": artist}
-        # Get a list of all the paintings by the artist.
-        while has_more:
-            new_meta = self._get_content(url, {"term": artist})
-            if len(new_meta["data"]) == 0:
-                break
-            meta_data.extend(new_meta["data"])
-            params['paginationToken'] = new_meta["paginationToken"]
-            has_more = new_meta["hasMore"]
-
-        # Check each painting until we find the right one.
-        for paint_meta in meta_data:
+        link_dirs = split_artwork_link(link)
+        if self.painting_index.is_primed(link_dirs[0]):
+            try:
+                return self._find_by_index(link)
+            except ValueError as error:
+                raise ValueError("Cannot find painting by artist.") from error
+
+        for paint_meta in self.iter_artist_paintings(link_dirs[0]):
+            if paint_meta.get("url", link_dirs[1]) != link_dirs[1]:
+                continue
             try:
                 return self._check_metadata(paint_meta, link_dirs)
             except ValueError:
                 pass
         raise ValueError("Cannot find painting by artist.")
 
+    def iter_artist_paintings(self, artist):
+        """Iterate over all paintings by an artist.
+
+        The search results are requested lazily, page by page, so that the
+        iteration can be stopped at any time and only one page is kept in
+        memory.
+
+        Parameters
+        ----------
+        artist: str
+            Url slug of the artist, e.g. "vincent-van-gogh".
+
+        Returns
+        -------
+        Iterator[dict]:
+            Painting data as in the search results of the WikiArt API, with
+            among others the items "id", "title", "url" and "artistUrl".
+        """
+        for paint_meta in self._iter_search(
+                {"term": artist.replace("-", " ")}):
+            if paint_meta.get("artistUrl") == artist:
+                yield paint_meta
+
+    def prime_artist(self, artist_slug):
+        """Add all paintings by an artist to the painting index.
+
+        This goes through all pages of search results for the artist once,
+        after which links to paintings by the artist can be resolved with a
+        single request.
+
+        Parameters
+        ----------
+        artist_slug: str
+            Url slug of the artist, e.g. "vincent-van-gogh".
+
+        Returns
+        -------
+        int:
+            Number of paintings by the artist that were found.
+        """
+        urls = [paint_meta["url"]
+                for paint_meta in self.iter_artist_paintings(artist_slug)
+                if paint_meta.get("url")]
+        # Only mark the artist if the index really has all paintings.
+        if all(self.painting_index.get(artist_slug, url) is not None
+               for url in urls):
+            self.painting_index.set_primed(artist_slug)
+        return len(urls)
+
     def _get_metadata(self):
-        """Find a painting from a link through 3 different methods"""
+        """Find a painting from a link through 4 different methods
+
+        First the index is tried, then searching for the painting and
+        scraping its page (the most successful of the two first, or both
+        at the same time if hedged), and finally all paintings by the
+        artist are checked.
+        """
+        link = self.link
         try:
-            return self._find_by_artist_painting()
+            return self._find_by_index(link)
         except ValueError:
             pass
+        strategies = self.strategy_stats.order(split_artwork_link(link)[0],
+                                               ["search", "scrape"])
+        # A failing server doesn't mean the painting doesn't exist: the
+        # other methods are still tried, and the error is raised if none
+        # of them finds the painting.
+        server_error = None
+        if self.hedged:
+            try:
+                return self._find_hedged(link, strategies)
+            except ValueError:
+                pass
+            except OSError as error:
+                server_error = error
+        else:
+            for name in strategies:
+                try:
+                    return self._try_strategy(name, link)
+                except ValueError:
+                    pass
+                except OSError as error:
+                    server_error = error
         try:
-            return self._find_by_scrape()
+            return self._find_by_artist(link)
         except ValueError:
-            pass
-        return self._find_by_artist()
+            if server_error is not None:
+                raise server_error from None
+            raise
+
+    def _try_strategy(self, name, link, stop=None):
+        """Run a strategy to find the painting and record its success"""
+        find = {"search": self._find_by_artist_painting,
+                "scrape": self._find_by_scrape}[name]
+        artist = split_artwork_link(link)[0]
+        self._hedge.stop = stop
+        try:
+            metadata = find(link)
+        except ValueError:
+            self.strategy_stats.record(artist, name, False)
+            raise
+        finally:
+            self._hedge.stop = None
+        self.strategy_stats.record(artist, name, True)
+        return metadata
+
+    def _find_hedged(self, link, strategies):
+        """Run strategies at the same time, return the first result
+
+        Once a strategy finds the painting, the others are cancelled, or
+        stopped before their next request. If all strategies fail, the
+        first error that is not a ValueError (e.g. an HTTPError) is raised,
+        otherwise a ValueError.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=2 * len(strategies),
+                thread_name_prefix="wikiart")
+        stop = threading.Event()
+        futures = [self._executor.submit(self._try_strategy, name, link, stop)
+                   for name in strategies]
+        other_error = None
+        try:
+            for future in as_completed(futures):
+                # Wait for the other strategies if one fails in any way.
+                # pylint: disable=broad-except
+                try:
+                    return future.result()
+                except ValueError:
+                    pass
+                except Exception as error:
+                    other_error = other_error or error
+        finally:
+            stop.set()
+            for future in futures:
+                future.cancel()
+        if other_error is not None:
+            raise other_error
+        raise ValueError("Cannot find painting by search or scrape.")
+
+    def _search(self, params):
+        """Search for paintings through the API, reusing stored results"""
+        key = "PaintingSearch?" + urlencode(sorted(params.items()))
+        meta_data = None
+        if self.lookup_cache is not None:
+            meta_data = self.lookup_cache.get_response(key)
+        if meta_data is None:
+            url = "https://www.wikiart.org/en/api/2/PaintingSearch"
+            meta_data = self._get_content(url, dict(params))
+            if self.lookup_cache is not None:
+                self.lookup_cache.put_response(key, meta_data)
+        # Also for stored results, since the index may be new.
+        self.painting_index.update(meta_data.get("data") or [])
+        return meta_data
+
+    def _iter_search(self, params):
+        """Iterate over the results of all pages of a search"""
+        params = dict(params)
+        while True:
+            meta_data = self._search(params)
+            yield from meta_data.get("data") or []
+            if not meta_data.get("data") or not meta_data.get("hasMore"):
+                return
+            params["paginationToken"] = meta_data["paginationToken"]
 
     def info_from_painting_id(self, painting_id):
         """Get the meta data from a painting_id"""
+        if self.lookup_cache is not None:
+            paint_data = self.lookup_cache.get_painting(painting_id)
+            if paint_data is not None:
+                return paint_data
         url = "https://www.wikiart.org/en/api/2/Painting"
         params = {"id": painting_id}
-        return self._get_content(url, params)
+        paint_data = self._get_content(url, params)
+        if self.lookup_cache is not None:
+            self.lookup_cache.put_painting(painting_id, paint_data)
+        self.painting_index.update([paint_data])
+        return paint_data
+
+    def save_metadata(self, meta_fp=None, revalidate=False):
+        """Save the metadata to a JSON file.
+
+        Arguments
+        ---------
+        meta_fp: str, Path
+            If None, then the default file path is computed with the
+            attribute output_dir. If not None, this file is used to dump the
+            data.
+        revalidate: bool, default=False
+            If true and the file already exists, fetch the metadata of the
+            painting again (conditionally, if validators were stored) and
+            only rewrite the file if it has changed.
+
+        Returns
+        -------
+        bool:
+            True if the file was (re)written.
+        """
+        meta_fp = self.meta_fp if meta_fp is None else Path(meta_fp)
+        if not (revalidate and meta_fp.is_file()):
+            existed = meta_fp.is_file()
+            super().save_metadata(meta_fp)
+            if not existed:
+                store_validators(meta_fp)
+            return not existed
+
+        with open(meta_fp, "r", encoding="utf-8") as f:
+            old_metadata = json.load(f)
+        validators = load_validators(meta_fp)
+        response = self._request(
+            "https://www.wikiart.org/en/api/2/Painting",
+            {"id": old_metadata["id"]}, conditional_headers(validators))
+        if response.status_code == 304:
+            return False
+        # Don't replace good metadata with an error page.
+        response.raise_for_status()
+        if response.status_code != 200:
+            raise IOError(f"Unexpected response ({response.status_code}) "
+                          f"when revalidating {meta_fp}.")
+        metadata = json.loads(response.text)
+        if not isinstance(metadata, dict) or \
+                metadata.get("id") != old_metadata["id"]:
+            raise ValueError(f"Invalid metadata when revalidating {meta_fp}.")
+        metadata["link"] = old_metadata.get("link", self.link)
+        new_data = json.dumps(metadata, ensure_ascii=False).encode("utf-8")
+        if hashlib.sha256(new_data).hexdigest() == file_hash(meta_fp):
+            store_validators(meta_fp, response.headers, validators)
+            return False
+
+        part_fp = Path(meta_fp.parent, meta_fp.name + ".part")
+        with open(part_fp, "wb") as f:
+            f.write(new_data)
+        os.replace(part_fp, meta_fp)
+        store_validators(meta_fp, response.headers)
+        self.metadata_cache.put(metadata["link"], metadata)
+        return True
+
+    def save_image(self, img_fp=None, link=None, revalidate=False):
+        """Save the image of the artwork to a file.
+
+        Arguments
+        ---------
+        img_fp: str, Path
+            File to save the image to. If the image has a different
+            suffix/extension from the supplied image_fp, then it is changed
+            and a warning is printed. If img_fp is None, the default
+            destination will be used.
+        link: str
+            Optionally the url to the artwork can be supplied, which will be
+            loaded instead.
+        revalidate: bool, default=False
+            If true and the image already exists, ask the server whether it
+            changed since it was downloaded, and only download it again if
+            it did.
 
-    def save_image(self, img_fp=None, link=None):
+        Returns
+        -------
+        bool:
+            True if the image was (re)downloaded and changed.
+        """
         metadata = self.get_metadata(link=link)
         img_url = metadata["image"]
         path = urlparse(img_url).path
         suffix = Path(path).suffix
         img_fp = self._convert_img_fp(img_fp, suffix)
 
-        if self.skip_existing and img_fp.is_file():
-            return
-        img_data = requests.get(img_url, timeout=self.timeout).content
+        # Images are only renamed into place once complete, so existing
+        # files can be trusted.
+        headers = None
+        validators = {}
+        if img_fp.is_file():
+            if self.skip_existing and not revalidate:
+                return False
+            validators = load_validators(img_fp)
+            if revalidate:
+                headers = conditional_headers(validators)
 
         if self.output_dir:
             self.paint_dir.mkdir(exist_ok=True)
-        with open(img_fp, "wb") as f:
-            f.write(img_data)
+        response_headers = self.session_pool.download(
+            img_url, img_fp, timeout=self.timeout, headers=headers)
+        if response_headers is None:
+            return False
+        new_validators = store_validators(img_fp, response_headers)
+        return new_validators["sha256"] != validators.get("sha256")
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        if self._own_pool:
+            self.session_pool.close()
+
+
+class StrategyStats:
+    """Success rates of the strategies to find paintings.
+
+    The rates are kept both globally and per artist, to try the strategy
+    that is most likely to succeed first.
+    """
+
+    def __init__(self):
+        self._global = {}
+        self._artists = {}
+        self._lock = threading.Lock()
+
+    def record(self, artist, name, success):
+        """Record an attempt of a strategy.
+
+        Parameters
+        ----------
+        artist: str
+            Url slug of the artist of the painting.
+        name: str
+            Name of the strategy.
+        success: bool
+            Whether the strategy found the painting.
+        """
+        with self._lock:
+            for counts in [self._global,
+                           self._artists.setdefault(artist, {})]:
+                successes, attempts = counts.get(name, (0, 0))
+                counts[name] = (successes + success, attempts + 1)
+
+    def success_rate(self, name, artist=None):
+        """Estimated probability that a strategy succeeds.
+
+        Parameters
+        ----------
+        name: str
+            Name of the strategy.
+        artist: str, optional
+            Url slug of the artist. If given, the rate for the artist is
+            estimated, with the global rate as prior.
+
+        Returns
+        -------
+        float:
+            Estimated success rate between 0 and 1.
+        """
+        with self._lock:
+            successes, attempts = self._global.get(name, (0, 0))
+            rate = (successes + 1) / (attempts + 2)
+            if artist is None:
+                return rate
+            successes, attempts = self._artists.get(artist, {}).get(
+                name, (0, 0))
+            return (successes + 2 * rate) / (attempts + 2)
+
+    def order(self, artist, names):
+        """Sort strategies from most to least likely to succeed.
+
+        Parameters
+        ----------
+        artist: str
+            Url slug of the artist of the painting.
+        names: list[str]
+            Names of the strategies, in their default order.
+
+        Returns
+        -------
+        list[str]:
+            The names of the strategies, the most successful first.
+        """
+        return sorted(names, key=lambda name: -self.success_rate(name, artist))
+
+    @property
+    def stats(self):
+        """dict: Global number of successes and attempts per strategy."""
+        with self._lock:
+            return {name: {"successes": successes, "attempts": attempts}
+                    for name, (successes, attempts) in self._global.items()}
 
 
-def _link_dirs(link):
-    return urlparse(link).path.split("/")[-2:]
+class _StrategyStopped(Exception):
+    """A hedged strategy was stopped, because another one succeeded"""
@@ -0,0 +1,114 @@
+"""Functions shared by the WikiArt scrapers.
+
+read_api_keys: Read (or ask for) the keys of the WikiArt API.
+split_artwork_link: Artist and painting of the link to an artwork page.
+search_terms: Search terms for a painting in the PaintingSearch API.
+page_missing: Whether the status of an artwork page means it's missing.
+PaintingIdScanner: Find the painting ID in an artwork page chunk by chunk.
+scan_painting_id: Find the painting ID in (the start of) an artwork page.
+is_painting: Whether painting data of the API belongs to a link.
+"""
+
+import re
+from urllib.parse import urlparse
+
+from artscraper.retrying import RETRYABLE_STATUS
+
+
+def read_api_keys():
+    """Read the API access/secret keys from the file .wiki_api
+
+    If the file does not exist, ask for the keys and store them.
+    """
+    try:
+        with open(".wiki_api", "r", encoding="utf-8") as f:
+            access_key, secret_key, *_ = f.read().split("\n")
+        return access_key, secret_key
+    except FileNotFoundError:
+        print("No API keys found in current directory.")
+        print("WikiArt API keys can be obtained from "
+              "'https://www.wikiart.org/en/App/GetApi'.")
+        access_key = input("WikiArt Access Key? ")
+        secret_key = input("WikiArt Secret Key? ")
+
+        str_out = "\n".join([access_key, secret_key, ""])
+        with open(".wiki_api", "w", encoding="utf-8") as f:
+            f.write(str_out)
+        return access_key, secret_key
+
+
+def page_missing(status_code):
+    """Whether the status of an artwork page means it doesn't exist"""
+    return 400 <= status_code < 500 and status_code not in RETRYABLE_STATUS
+
+
+def split_artwork_link(link):
+    """Artist and painting of a link, e.g. ["vincent-van-gogh", "the-bedroom-1889"]"""
+    return urlparse(link).path.split("/")[-2:]
+
+
+def search_terms(link_dirs):
+    """Search terms for the PaintingSearch API: artist + painting name"""
+    terms = " ".join(link_dirs).replace("-", " ")
+    try:
+        int(terms[-4:])
+        terms = terms[:-5]
+    except ValueError:
+        pass
+    return terms
+
+
+# The painting ID of the page itself is in a script; data attributes can
+# also belong to other (related) paintings, so they are only a fallback.
+_PAINTING_ID_RGX = re.compile(rb"paintingId = '([^']+)'")
+_FALLBACK_ID_RGX = re.compile(rb'data-painting-id="([^"]+)"')
+# Number of bytes kept between chunks, so that matches can cross them.
+_SCAN_OVERLAP = 256
+
+
+class PaintingIdScanner:
+    """Scan an artwork page chunk by chunk for the painting ID"""
+
+    def __init__(self):
+        self._buffer = b""
+        self._fallback = None
+        self.n_read = 0
+
+    def feed(self, chunk):
+        """Add the next chunk, return the painting ID once found"""
+        self._buffer += chunk
+        self.n_read += len(chunk)
+        match = _PAINTING_ID_RGX.search(self._buffer)
+        if match is not None:
+            return match.group(1).decode("utf-8")
+        if self._fallback is None:
+            match = _FALLBACK_ID_RGX.search(self._buffer)
+            if match is not None:
+                self._fallback = match.group(1).decode("utf-8")
+        self._buffer = self._buffer[-_SCAN_OVERLAP:]
+        return None
+
+    def finish(self):
+        """Painting ID from the fallback pattern at the end of the scan"""
+        return self._fallback
+
+
+def scan_painting_id(chunks, max_bytes):
+    """Get the painting ID from (the first max_bytes of) a page"""
+    scanner = PaintingIdScanner()
+    for chunk in chunks:
+        paint_id = scanner.feed(chunk)
+        if paint_id is not None:
+            return paint_id
+        if scanner.n_read >= max_bytes:
+            break
+    paint_id = scanner.finish()
+    if paint_id is None:
+        raise ValueError("Cannot find painting by scrape.")
+    return paint_id
+
+
+def is_painting(paint_data, link_dirs):
+    """Check whether the painting data belongs to the link"""
+    return (paint_data["artistUrl"] == link_dirs[0]
+            and paint_data["url"] == link_dirs[1])
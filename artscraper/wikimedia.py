@@ -0,0 +1,478 @@
+"""Batched lookups on Wikipedia and Wikidata over plain HTTP.
+
+WikidataResolver: Wikipedia article -> Wikidata id, 50 titles per request.
+WikipediaExtracts: Lead sections of Wikipedia articles, cached by revision.
+sparql_values_query: Turn a query for one item into one for many items.
+split_bindings: Split the results of such a query per item.
+"""
+
+import re
+from urllib.parse import unquote
+from urllib.parse import urlparse
+
+from artscraper.cache import SQLiteCache
+from artscraper.session import SessionPool
+
+# Wikimedia asks clients to identify themselves.
+USER_AGENT = "artscraper (https://github.com/sodascience/artscraper)"
+
+#: Maximum number of titles in one request to the Wikipedia API.
+MAX_TITLES = 50
+
+#: Maximum number of intro extracts in one request to the Wikipedia API.
+MAX_EXTRACTS = 20
+
+#: Endpoint of the Wikidata query service.
+SPARQL_URL = "https://query.wikidata.org/sparql"
+
+ENTITY_PREFIX = "http://www.wikidata.org/entity/"
+
+_AGGREGATE_RGX = re.compile(
+    r"\b(COUNT|SUM|MIN|MAX|AVG|SAMPLE|GROUP_CONCAT)\s*\(", re.IGNORECASE)
+
+
+class WikidataResolver:
+    """Find the Wikidata ids of Wikipedia articles.
+
+    The ids are looked up with the pageprops of the MediaWiki API, for up
+    to 50 articles (of the same language) per request, instead of opening
+    every article in a browser. Redirects are followed.
+
+    Parameters
+    ----------
+    cache: SQLiteCache or str or Path, optional
+        Cache (or file for one) to keep the ids across runs. By default
+        they are only kept in memory.
+    session_pool: SessionPool, optional
+        Pool of HTTP sessions to request with.
+    timeout: float, default=60
+        Timeout for requests in seconds.
+    rate_limiter: AdaptiveRateLimiter or TokenBucket, optional
+        Rate limiter for the requests, by default none.
+    """
+
+    def __init__(self, cache=None, session_pool=None, timeout=60,
+                 rate_limiter=None):
+        if cache is not None and not isinstance(cache, SQLiteCache):
+            cache = SQLiteCache(cache)
+        self.cache = cache
+        self._memory = {}
+        self._own_pool = session_pool is None
+        if session_pool is None:
+            session_pool = SessionPool(timeout=timeout)
+        self.session_pool = session_pool
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+
+    def _get_cached(self, key):
+        if key in self._memory:
+            return True, self._memory[key]
+        if self.cache is not None:
+            value = self.cache.get_response(key)
+            if value is not None:
+                self._memory[key] = value["id"]
+                return True, value["id"]
+        return False, None
+
+    def _put_cached(self, key, wikidata_id):
+        self._memory[key] = wikidata_id
+        if self.cache is not None:
+            self.cache.put_response(key, {"id": wikidata_id})
+
+    def resolve_titles(self, titles, language="en"):
+        """Get the Wikidata ids of Wikipedia articles by title.
+
+        Parameters
+        ----------
+        titles: iterable of str
+            Titles of the articles, e.g. "Vincent_van_Gogh".
+        language: str, default="en"
+            Language code of the Wikipedia.
+
+        Returns
+        -------
+        dict:
+            For each title the Wikidata id (e.g. "Q5582"), or None if the
+            article or its id doesn't exist.
+        """
+        wikidata_ids = {}
+        missing = []
+        for title in dict.fromkeys(titles):
+            found, wikidata_id = self._get_cached(_cache_key(language, title))
+            if found:
+                wikidata_ids[title] = wikidata_id
+            else:
+                missing.append(title)
+
+        for start in range(0, len(missing), MAX_TITLES):
+            batch = missing[start:start + MAX_TITLES]
+            for title, wikidata_id in self._query(batch, language).items():
+                self._put_cached(_cache_key(language, title), wikidata_id)
+                wikidata_ids[title] = wikidata_id
+        return wikidata_ids
+
+    def _query(self, titles, language):
+        """Look up the Wikidata ids of at most 50 titles with one request"""
+        response = self.session_pool.get(
+            f"https://{language}.wikipedia.org/w/api.php",
+            params={"action": "query", "prop": "pageprops",
+                    "ppprop": "wikibase_item", "redirects": 1,
+                    "format": "json", "formatversion": 2,
+                    "titles": "|".join(titles)},
+            headers={"User-Agent": USER_AGENT}, timeout=self.timeout,
+            rate_limiter=self.rate_limiter)
+        response.raise_for_status()
+        query = response.json().get("query", {})
+        page_ids = {page["title"]: page.get("pageprops", {}).get(
+                        "wikibase_item")
+                    for page in query.get("pages", [])}
+        return {title: page_ids.get(final_title)
+                for title, final_title in _final_titles(query, titles).items()}
+
+    def resolve(self, wikipedia_links):
+        """Get the Wikidata ids of Wikipedia articles by link.
+
+        The links are grouped by language, so that all links are resolved
+        with a handful of requests.
+
+        Parameters
+        ----------
+        wikipedia_links: iterable of str
+            Links to Wikipedia articles, e.g.
+            "https://en.wikipedia.org/wiki/Vincent_van_Gogh".
+
+        Returns
+        -------
+        dict:
+            For each link the Wikidata id, or None if it can't be found.
+        """
+        by_language = {}
+        for link in dict.fromkeys(wikipedia_links):
+            language, title = wikipedia_title(link)
+            by_language.setdefault(language, {})[link] = title
+
+        wikidata_ids = {}
+        for language, titles in by_language.items():
+            title_ids = self.resolve_titles(titles.values(), language)
+            wikidata_ids.update({link: title_ids[title]
+                                 for link, title in titles.items()})
+        return wikidata_ids
+
+    def close(self):
+        """Close the connections, if the pool is not shared."""
+        if self._own_pool:
+            self.session_pool.close()
+
+
+class WikipediaExtracts:
+    """Get the lead sections (intros) of Wikipedia articles as plain text.
+
+    The intros are requested for many articles (of the same language) at
+    once, and stored together with the revision of the article. Stored
+    intros are checked against the latest revisions with one request per
+    50 articles, so that only the intros of edited articles are fetched
+    again.
+
+    Parameters
+    ----------
+    cache: SQLiteCache or str or Path, optional
+        Cache (or file for one) to keep the intros across runs. By default
+        they are only kept in memory.
+    session_pool: SessionPool, optional
+        Pool of HTTP sessions to request with.
+    timeout: float, default=60
+        Timeout for requests in seconds.
+    rate_limiter: AdaptiveRateLimiter or TokenBucket, optional
+        Rate limiter for the requests, by default none.
+    """
+
+    def __init__(self, cache=None, session_pool=None, timeout=60,
+                 rate_limiter=None):
+        if cache is not None and not isinstance(cache, SQLiteCache):
+            cache = SQLiteCache(cache)
+        self.cache = cache
+        # Intros that are known to be up to date in this session.
+        self._memory = {}
+        self._own_pool = session_pool is None
+        if session_pool is None:
+            session_pool = SessionPool(timeout=timeout)
+        self.session_pool = session_pool
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+
+    def _api_query(self, language, **params):
+        """Do a query with the API of the Wikipedia of a language"""
+        params = {"action": "query", "redirects": 1, "format": "json",
+                  "formatversion": 2, **params}
+        query = {}
+        pages = {}
+        # The API can spread the results over several responses (e.g. not
+        # all extracts of a batch fit in one), continue until it's complete.
+        while True:
+            response = self.session_pool.get(
+                f"https://{language}.wikipedia.org/w/api.php", params=params,
+                headers={"User-Agent": USER_AGENT}, timeout=self.timeout,
+                rate_limiter=self.rate_limiter)
+            response.raise_for_status()
+            data = response.json()
+            part = data.get("query", {})
+            for key in ("normalized", "redirects"):
+                query.setdefault(key, part.get(key, []))
+            for page in part.get("pages", []):
+                pages.setdefault(page["title"], {}).update(page)
+            if "continue" not in data:
+                break
+            params.update(data["continue"])
+        query["pages"] = list(pages.values())
+        return query
+
+    def _revisions(self, titles, language):
+        """Get the latest revision of at most 50 titles with one request"""
+        query = self._api_query(language, prop="info",
+                                titles="|".join(titles))
+        revisions = {page["title"]: page.get("lastrevid")
+                     for page in query.get("pages", [])}
+        return {title: revisions.get(final_title)
+                for title, final_title in _final_titles(query, titles).items()}
+
+    def _extracts(self, titles, language):
+        """Get the intro and revision of at most 20 titles with one request"""
+        query = self._api_query(language, prop="extracts|info", exintro=1,
+                                explaintext=1, exlimit=MAX_EXTRACTS,
+                                titles="|".join(titles))
+        pages = {page["title"]: {"revision": page.get("lastrevid"),
+                                 "extract": _page_extract(page)}
+                 for page in query.get("pages", [])}
+        return {title: pages.get(final_title,
+                                 {"revision": None, "extract": ""})
+                for title, final_title in _final_titles(query, titles).items()}
+
+    def get_titles(self, titles, language="en"):
+        """Get the intros of Wikipedia articles by title.
+
+        Parameters
+        ----------
+        titles: iterable of str
+            Titles of the articles, e.g. "Vincent_van_Gogh".
+        language: str, default="en"
+            Language code of the Wikipedia.
+
+        Returns
+        -------
+        dict:
+            For each title the intro of the article as plain text, or an
+            empty string if the article doesn't exist.
+        """
+        titles = list(dict.fromkeys(titles))
+        extracts = {}
+        stored = {}
+        for title in titles:
+            key = _extract_key(language, title)
+            if key in self._memory:
+                extracts[title] = self._memory[key]
+            elif self.cache is not None:
+                stored[title] = self.cache.get_response(key)
+
+        # Check which stored intros belong to the latest revision.
+        to_check = [title for title, value in stored.items()
+                    if value is not None]
+        for start in range(0, len(to_check), MAX_TITLES):
+            batch = to_check[start:start + MAX_TITLES]
+            for title, revision in self._revisions(batch, language).items():
+                if revision == stored[title]["revision"]:
+                    extracts[title] = stored[title]["extract"]
+                    self._memory[_extract_key(language, title)] = (
+                        extracts[title])
+
+        missing = [title for title in titles if title not in extracts]
+        for start in range(0, len(missing), MAX_EXTRACTS):
+            batch = missing[start:start + MAX_EXTRACTS]
+            for title, value in self._extracts(batch, language).items():
+                if value["extract"] is None:
+                    # Don't store the intro, so it's requested next time.
+                    extracts[title] = ""
+                    continue
+                key = _extract_key(language, title)
+                extracts[title] = value["extract"]
+                self._memory[key] = value["extract"]
+                if self.cache is not None:
+                    self.cache.put_response(key, value)
+        return extracts
+
+    def get(self, wikipedia_links):
+        """Get the intros of Wikipedia articles by link.
+
+        The links are grouped by language, so that the intros of many
+        articles are fetched with few requests.
+
+        Parameters
+        ----------
+        wikipedia_links: iterable of str
+            Links to Wikipedia articles, e.g.
+            "https://en.wikipedia.org/wiki/Vincent_van_Gogh".
+
+        Returns
+        -------
+        dict:
+            For each link the intro of the article as plain text.
+        """
+        by_language = {}
+        for link in dict.fromkeys(wikipedia_links):
+            language, title = wikipedia_title(link)
+            by_language.setdefault(language, {})[link] = title
+
+        extracts = {}
+        for language, titles in by_language.items():
+            title_extracts = self.get_titles(titles.values(), language)
+            extracts.update({link: title_extracts[title]
+                             for link, title in titles.items()})
+        return extracts
+
+    def close(self):
+        """Close the connections, if the pool is not shared."""
+        if self._own_pool:
+            self.session_pool.close()
+
+
+def wikipedia_title(wikipedia_link):
+    """Get the language and title of a Wikipedia article from its link.
+
+    Parameters
+    ----------
+    wikipedia_link: str
+        Link to the article, e.g.
+        "https://en.wikipedia.org/wiki/Vincent_van_Gogh".
+
+    Returns
+    -------
+    tuple(str, str):
+        The language code and title, e.g. ("en", "Vincent_van_Gogh").
+    """
+    parsed_url = urlparse(wikipedia_link)
+    language = parsed_url.netloc.split(".")[0]
+    title = unquote(parsed_url.path.rsplit("/", 1)[-1])
+    return language, title
+
+
+def sparql_values_query(query, wikidata_ids, placeholder="person_id",
+                        variable="person"):
+    """Turn a SPARQL query about one item into a query about many items.
+
+    The item in the query (wd:<placeholder>) is replaced by a variable,
+    which is bound to all items with a VALUES clause and added to the
+    selected variables (unless the query selects *), so that the results can
+    be split per item. Queries with aggregates are grouped by the variable
+    as well, so they need a GROUP BY clause, e.g. GROUP BY wd:<placeholder>.
+
+    Parameters
+    ----------
+    query: str
+        Query with wd:<placeholder> for the item, e.g. wd:person_id.
+    wikidata_ids: iterable of str
+        Wikidata ids of the items, e.g. ["Q5582", "Q5598"].
+    placeholder: str, default="person_id"
+        Name that stands for the item in the query.
+    variable: str, default="person"
+        Name of the variable for the items.
+
+    Returns
+    -------
+    str:
+        The query for all items.
+    """
+    if f"wd:{placeholder}" not in query:
+        raise ValueError(f"The query should refer to the item as "
+                         f"wd:{placeholder}.")
+    query = query.replace(f"wd:{placeholder}", f"?{variable}")
+    values = " ".join(f"wd:{wikidata_id}" for wikidata_id in wikidata_ids)
+    query, n_where = re.subn(
+        r"\bWHERE\s*\{", f"WHERE {{\n  VALUES ?{variable} {{ {values} }}",
+        query, count=1, flags=re.IGNORECASE)
+    select = re.search(r"\bSELECT(\s+DISTINCT|\s+REDUCED)?\b(\s*\*)?",
+                       query, flags=re.IGNORECASE)
+    if n_where == 0 or select is None:
+        raise ValueError("Cannot find the SELECT ... WHERE { of the query.")
+    # SELECT * already includes the variable.
+    if select.group(2) is None:
+        query = (query[:select.end()] + f" ?{variable}"
+                 + query[select.end():])
+    return _group_by_variable(query, placeholder, variable)
+
+
+def _group_by_variable(query, placeholder, variable):
+    """Add the variable for the items to the GROUP BY clause of a query"""
+    group_by = re.search(r"\bGROUP\s+BY\b", query, flags=re.IGNORECASE)
+    if group_by is None:
+        if _AGGREGATE_RGX.search(query):
+            raise ValueError(
+                "A query with aggregates should be grouped per item, e.g. "
+                f"SELECT (COUNT(?x) AS ?n) WHERE {{ ... }} GROUP BY "
+                f"wd:{placeholder}.")
+        return query
+    group_vars = query[group_by.end():]
+    end = re.search(r"\b(HAVING|ORDER\s+BY|LIMIT|OFFSET)\b", group_vars,
+                    flags=re.IGNORECASE)
+    if end is not None:
+        group_vars = group_vars[:end.start()]
+    if re.search(rf"\?{variable}\b", group_vars):
+        return query
+    return query[:group_by.end()] + f" ?{variable}" + query[group_by.end():]
+
+
+def split_bindings(data, variable="person"):
+    """Split the results of a query for many items per item.
+
+    Parameters
+    ----------
+    data: dict
+        Results of a query created with sparql_values_query, in the SPARQL
+        JSON format.
+    variable: str, default="person"
+        Name of the variable for the items.
+
+    Returns
+    -------
+    dict:
+        For each Wikidata id the bindings (rows) of that item, in the
+        original order, without the variable for the item.
+    """
+    bindings = {}
+    for row in data["results"]["bindings"]:
+        row = dict(row)
+        item = row.pop(variable, {}).get("value", "")
+        bindings.setdefault(item.removeprefix(ENTITY_PREFIX), []).append(row)
+    return bindings
+
+
+def _final_titles(query, titles):
+    """Map titles to the titles of the pages in a response of the API"""
+    # Titles are normalized (e.g. _ -> space) and redirected by the API.
+    renamed = {}
+    for item in query.get("normalized", []) + query.get("redirects", []):
+        renamed[item["from"]] = item["to"]
+    final_titles = {}
+    for title in titles:
+        final_title = title
+        # Follow at most a few renames, to guard against loops.
+        for _ in range(3):
+            final_title = renamed.get(final_title, final_title)
+        final_titles[title] = final_title
+    return final_titles
+
+
+def _page_extract(page):
+    """Extract of a page in a response of the API, None if it's left out"""
+    if "extract" in page:
+        return page["extract"]
+    # Pages that don't exist have no extract.
+    if page.get("missing") or page.get("invalid"):
+        return ""
+    return None
+
+
+def _cache_key(language, title):
+    return f"wikidata_id:{language}:{title}"
+
+
+def _extract_key(language, title):
+    return f"extract:{language}:{title}"
@@ -18,10 +18,15 @@ setup(
     packages=find_packages(exclude=['data', 'docs', 'tests', 'examples']),
     python_requires='~=3.6',
     install_requires=[
+        "numpy",
         "requests",
         "selenium",
         "beautifulsoup4",
-        "wikipedia-api",
         "webdriver-manager",
-    ]
+    ],
+    extras_require={
+        "async": ["httpx"],
+        "http2": ["httpx[http2]"],
+        "tiles": ["pillow"],
+    }
 )
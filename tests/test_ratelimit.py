@@ -0,0 +1,153 @@
+"""Tests for the rate limiters, also against a local server."""
+
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from artscraper import AdaptiveRateLimiter, SessionPool, TokenBucket
+from artscraper.ratelimit import parse_retry_after
+
+URL = "https://www.wikiart.org/en/api/2/Painting"
+OTHER_URL = "https://artsandculture.google.com/asset/x"
+
+
+@pytest.fixture(name="busy_server")
+def fixture_busy_server():
+    """Server that replies 429 with Retry-After: 1 to /busy, else 200"""
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # pylint: disable=invalid-name
+            if self.path == "/busy":
+                self.send_response(429)
+                self.send_header("Retry-After", "1")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):  # pylint: disable=arguments-differ
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _elapsed(function, *args):
+    start = time.monotonic()
+    function(*args)
+    return time.monotonic() - start
+
+
+def test_additive_increase():
+    limiter = AdaptiveRateLimiter(10, max_rate=20, increase=2)
+    for _ in range(3):
+        limiter.record(URL, 200)
+    assert limiter.current_rate(URL) == pytest.approx(16)
+    for _ in range(10):
+        limiter.record(URL, 200)
+    assert limiter.current_rate(URL) == pytest.approx(20)
+
+
+def test_multiplicative_decrease():
+    limiter = AdaptiveRateLimiter(10, min_rate=2)
+    limiter.record(URL, 503)
+    assert limiter.current_rate(URL) == pytest.approx(5)
+    # A burst of failures within one interval counts as one.
+    limiter.record(URL, 429)
+    limiter.record(URL, error=True)
+    assert limiter.current_rate(URL) == pytest.approx(5)
+    for _ in range(3):
+        time.sleep(0.5)
+        limiter.record(URL, error=True)
+    assert limiter.current_rate(URL) == pytest.approx(2)
+    assert limiter.stats["www.wikiart.org"]["failures"] == 6
+
+
+def test_slow_responses_decrease():
+    limiter = AdaptiveRateLimiter(10, slow_after=1)
+    limiter.record(URL, 200, latency=0.5)
+    assert limiter.current_rate(URL) == pytest.approx(10)
+    limiter.record(URL, 200, latency=2)
+    assert limiter.current_rate(URL) == pytest.approx(5)
+
+
+def test_client_errors_keep_rate():
+    limiter = AdaptiveRateLimiter(10, max_rate=20)
+    limiter.record(URL, 404)
+    assert limiter.current_rate(URL) == pytest.approx(10)
+
+
+def test_rate_per_host():
+    limiter = AdaptiveRateLimiter(10)
+    limiter.record(URL, 503)
+    assert limiter.current_rate(URL) == pytest.approx(5)
+    assert limiter.current_rate(OTHER_URL) == pytest.approx(10)
+
+
+def test_acquire_spaces_requests():
+    limiter = AdaptiveRateLimiter(20)
+    elapsed = _elapsed(lambda: [limiter.acquire(URL) for _ in range(5)])
+    assert 0.15 < elapsed < 0.5
+    # Other hosts have their own budget.
+    assert _elapsed(limiter.acquire, OTHER_URL) < 0.05
+
+
+def test_retry_after_blocks_host():
+    limiter = AdaptiveRateLimiter(100)
+    limiter.acquire(URL)
+    limiter.record(URL, 429, retry_after=0.5)
+    assert _elapsed(limiter.acquire, URL) > 0.4
+    assert _elapsed(limiter.acquire, OTHER_URL) < 0.1
+
+
+@pytest.mark.parametrize("min_wait", [0, None, -1])
+def test_no_min_wait_is_unlimited(min_wait):
+    limiter = AdaptiveRateLimiter.from_min_wait(min_wait)
+    assert limiter.current_rate(URL) == math.inf
+    elapsed = _elapsed(lambda: [limiter.acquire(URL) for _ in range(100)])
+    assert elapsed < 0.1
+    limiter.record(URL, 503)
+    limiter.record(URL, 200)
+    # Retry-After is still respected.
+    limiter.record(URL, 429, retry_after=0.3)
+    assert _elapsed(limiter.acquire, URL) > 0.2
+
+
+def test_from_min_wait():
+    limiter = AdaptiveRateLimiter.from_min_wait(0.5)
+    assert limiter.current_rate(URL) == pytest.approx(2)
+    assert TokenBucket.from_min_wait(0.5).rate == pytest.approx(2)
+
+
+def test_invalid_rate():
+    with pytest.raises(ValueError):
+        AdaptiveRateLimiter(0)
+    with pytest.raises(ValueError):
+        TokenBucket(-1)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after("") is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+
+
+def test_session_pool_reports_to_limiter(busy_server):
+    limiter = AdaptiveRateLimiter(100)
+    with SessionPool() as pool:
+        response = pool.get(busy_server + "/busy", rate_limiter=limiter)
+        assert response.status_code == 429
+        assert limiter.current_rate(busy_server) == pytest.approx(50)
+        start = time.monotonic()
+        response = pool.get(busy_server + "/ok", rate_limiter=limiter)
+        assert response.status_code == 200
+        assert time.monotonic() - start > 0.8
+    assert limiter.current_rate(busy_server) == pytest.approx(60)
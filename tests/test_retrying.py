@@ -0,0 +1,192 @@
+"""Tests for the retry engine, also against a local flaky server."""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from artscraper import RetryBudget, RetryPolicy, SessionPool
+from artscraper.functions import retry
+
+
+def _http_error(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+class _Flaky:
+    """Function that raises the given errors before it succeeds"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, value="done"):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return value
+
+
+@pytest.fixture(name="sleeps")
+def fixture_sleeps(monkeypatch):
+    """Record the waits of the retries instead of sleeping"""
+    sleeps = []
+    monkeypatch.setattr("artscraper.retrying.time.sleep", sleeps.append)
+    return sleeps
+
+
+@pytest.fixture(name="flaky_server")
+def fixture_flaky_server():
+    """Server that replies 503 twice and then 200, returns (url, paths)"""
+    paths = []
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # pylint: disable=invalid-name
+            paths.append(self.path)
+            self.send_response(503 if len(paths) <= 2 else 200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):  # pylint: disable=arguments-differ
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/", paths
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("error,retryable", [
+    (ConnectionError(), True),
+    (TimeoutError(), True),
+    (requests.ConnectionError(), True),
+    (_http_error(503), True),
+    (_http_error(429), True),
+    (_http_error(404), False),
+    (_http_error(403), False),
+    (ValueError("Cannot find painting by scrape."), False),
+    (KeyError("id"), False),
+    (FileNotFoundError(), False),
+    (RuntimeError(), False),
+])
+def test_is_retryable(error, retryable):
+    assert RetryPolicy().is_retryable(error) == retryable
+
+
+def test_custom_classification():
+    policy = RetryPolicy(retryable=(RuntimeError, ), fatal=(OSError, ))
+    assert policy.is_retryable(RuntimeError())
+    assert not policy.is_retryable(ConnectionError())
+
+
+def test_delay():
+    policy = RetryPolicy(base_delay=1, multiplier=2, max_delay=5, jitter=0)
+    assert [policy.delay(attempt) for attempt in range(1, 5)] == [1, 2, 4, 5]
+    policy = RetryPolicy(base_delay=1, multiplier=2)
+    for attempt in range(1, 5):
+        assert 0 <= policy.delay(attempt) <= 2**(attempt - 1)
+
+
+def test_delay_retry_after():
+    policy = RetryPolicy(base_delay=1, max_delay=30, jitter=0)
+    assert policy.delay(1, _http_error(429, {"Retry-After": "10"})) == 10
+    assert policy.delay(1, _http_error(429, {"Retry-After": "100"})) == 30
+
+
+def test_call_retries_until_success(sleeps):
+    flaky = _Flaky(ConnectionError(), _http_error(503))
+    result = RetryPolicy(max_attempts=3, budget=None).call(flaky, "value")
+    assert result.ok
+    assert result.value == "value"
+    assert result.attempts == 3
+    assert len(result.errors) == 2
+    assert len(sleeps) == 2
+
+
+def test_call_fatal_error(sleeps):
+    flaky = _Flaky(ValueError("Cannot find painting."))
+    result = RetryPolicy(max_attempts=3).call(flaky)
+    assert not result.ok
+    assert not result.retryable
+    assert result.attempts == 1
+    assert not sleeps
+    with pytest.raises(ValueError):
+        result.unwrap()
+
+
+def test_call_gives_up(sleeps):
+    flaky = _Flaky(*[ConnectionError()] * 5)
+    result = RetryPolicy(max_attempts=3, budget=None).call(flaky)
+    assert not result.ok
+    assert result.retryable
+    assert result.attempts == 3
+    assert len(sleeps) == 2
+
+
+def test_call_async():
+    flaky = _Flaky(ConnectionError(), ConnectionError())
+    policy = RetryPolicy(max_attempts=3, base_delay=0.01, budget=None)
+
+    async def _function():
+        return flaky()
+
+    result = asyncio.run(policy.call_async(_function))
+    assert result.ok
+    assert result.attempts == 3
+
+
+def test_budget():
+    budget = RetryBudget(ratio=0.5, min_retries=1)
+    for _ in range(4):
+        budget.record_call()
+    assert [budget.try_retry() for _ in range(4)] == [True, True, True,
+                                                      False]
+    assert budget.stats == {"calls": 4, "retries": 3, "rejected": 1}
+
+
+def test_budget_shared_by_calls(sleeps):
+    budget = RetryBudget(ratio=0, min_retries=2)
+    policy = RetryPolicy(max_attempts=5, budget=budget)
+    results = [policy.call(_Flaky(*[ConnectionError()] * 5))
+               for _ in range(3)]
+    assert [result.attempts for result in results] == [3, 1, 1]
+    assert len(sleeps) == 2
+    assert budget.stats["rejected"] == 3
+
+
+def test_flaky_server(flaky_server, sleeps):
+    url, paths = flaky_server
+
+    def _get(pool):
+        response = pool.get(url)
+        response.raise_for_status()
+        return response.text
+
+    with SessionPool() as pool:
+        result = RetryPolicy(max_attempts=3, budget=None).call(_get, pool)
+    assert result.value == "ok"
+    assert len(paths) == 3
+    assert len(sleeps) == 2
+
+
+def test_functions_retry_min_wait(sleeps):
+    flaky = _Flaky(*[ValueError()] * 3)
+    assert retry(flaky, 4, 0.5, "value") == "value"
+    assert flaky.calls == 4
+    assert len(sleeps) == 3
+    assert all(0.5 <= wait <= 1.5 for wait in sleeps)
+
+
+def test_functions_retry_no_wait(sleeps, capsys):
+    flaky = _Flaky(*[ValueError()] * 3)
+    assert retry(flaky, 2, 0) is None
+    assert sleeps == [0]
+    assert "failed after 2 attempt(s)" in capsys.readouterr().out
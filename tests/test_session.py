@@ -0,0 +1,143 @@
+"""Tests for resumable downloads, against a local file server."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from artscraper import SessionPool
+
+BODY = bytes(range(256)) * 64
+ETAG = '"v2"'
+
+
+class _FileServer(ThreadingHTTPServer):
+    """Serve BODY with ranges, and record the headers of the requests"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.requests = []
+        # Number of bytes after which to drop the connection, per request.
+        self.cut_after = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/image.jpg"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.server.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        offset = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") in (None, ETAG):
+            offset = int(range_header[len("bytes="):-1])
+        body = BODY[offset:]
+        self.send_response(206 if offset else 200)
+        if offset:
+            self.send_header("Content-Range",
+                             f"bytes {offset}-{len(BODY) - 1}/{len(BODY)}")
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.server.cut_after:
+            self.wfile.write(body[:self.server.cut_after.pop(0)])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture(name="file_server")
+def fixture_file_server():
+    """Serve BODY with ETag ETAG"""
+    server = _FileServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _leave_part(fp, content, validator):
+    """Leave a partial download behind, as an interrupted run would"""
+    part_fp = fp.parent / (fp.name + ".part")
+    part_fp.write_bytes(content)
+    with open(part_fp.parent / (part_fp.name + ".json"), "w",
+              encoding="utf-8") as f:
+        json.dump({"validator": validator}, f)
+
+
+def test_download(file_server, tmp_path):
+    fp = tmp_path / "image.jpg"
+    with SessionPool() as pool:
+        headers = pool.download(file_server.url, fp)
+    assert fp.read_bytes() == BODY
+    assert headers["ETag"] == ETAG
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["image.jpg"]
+
+
+def test_download_resumes_interrupted(file_server, tmp_path):
+    file_server.cut_after = [5000]
+    fp = tmp_path / "image.jpg"
+    with SessionPool() as pool:
+        pool.download(file_server.url, fp, chunk_size=1000)
+    assert fp.read_bytes() == BODY
+    assert len(file_server.requests) == 2
+    assert file_server.requests[1]["Range"] == "bytes=5000-"
+    assert file_server.requests[1]["If-Range"] == ETAG
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["image.jpg"]
+
+
+def test_download_resumes_left_part(file_server, tmp_path):
+    fp = tmp_path / "image.jpg"
+    _leave_part(fp, BODY[:3000], ETAG)
+    with SessionPool() as pool:
+        pool.download(file_server.url, fp)
+    assert fp.read_bytes() == BODY
+    assert len(file_server.requests) == 1
+    assert file_server.requests[0]["Range"] == "bytes=3000-"
+
+
+def test_download_restarts_changed_file(file_server, tmp_path):
+    fp = tmp_path / "image.jpg"
+    _leave_part(fp, b"x" * 3000, '"v1"')
+    with SessionPool() as pool:
+        pool.download(file_server.url, fp)
+    assert fp.read_bytes() == BODY
+    assert file_server.requests[0]["If-Range"] == '"v1"'
+
+
+def test_download_ignores_part_without_validator(file_server, tmp_path):
+    fp = tmp_path / "image.jpg"
+    (tmp_path / "image.jpg.part").write_bytes(b"x" * 3000)
+    with SessionPool() as pool:
+        pool.download(file_server.url, fp)
+    assert fp.read_bytes() == BODY
+    assert "Range" not in file_server.requests[0]
+
+
+def test_download_not_modified(file_server, tmp_path):
+    fp = tmp_path / "image.jpg"
+    with SessionPool() as pool:
+        headers = pool.download(file_server.url, fp,
+                                headers={"If-None-Match": ETAG})
+    assert headers is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_download_interrupted_too_often(file_server, tmp_path):
+    file_server.cut_after = [0, 0, 0]
+    with SessionPool() as pool, pytest.raises(IOError):
+        pool.download(file_server.url, tmp_path / "image.jpg", max_resumes=2)
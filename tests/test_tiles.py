@@ -0,0 +1,137 @@
+"""Tests for fetching tiled images, against a local tile server."""
+
+import io
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from artscraper import SessionPool
+from artscraper.tiles import fetch_tiled_image, parse_tile_info
+
+Image = pytest.importorskip("PIL.Image")
+
+TILE_SIZE = 64
+TEMPLATE = "{base_url}=x{x}-y{y}-z{z}"
+_TILE_RGX = re.compile(r"^/image=x(\d+)-y(\d+)-z(\d+)$")
+
+
+def _levels(image):
+    """Image of each level of the pyramid, from smallest to largest"""
+    small = image[::4, ::4]
+    return [small, image]
+
+
+def _tile_info_xml(levels):
+    xml_levels = []
+    for level in levels:
+        n_x = -(-level.shape[1] // TILE_SIZE)
+        n_y = -(-level.shape[0] // TILE_SIZE)
+        xml_levels.append(
+            f'<pyramid_level num_tiles_x="{n_x}" num_tiles_y="{n_y}" '
+            f'empty_pels_x="{n_x * TILE_SIZE - level.shape[1]}" '
+            f'empty_pels_y="{n_y * TILE_SIZE - level.shape[0]}"/>')
+    return (f'<TileInfo tile_width="{TILE_SIZE}" tile_height="{TILE_SIZE}">'
+            + "".join(xml_levels) + "</TileInfo>")
+
+
+def _png(array):
+    buffer = io.BytesIO()
+    Image.fromarray(array).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture(name="tile_server")
+def fixture_tile_server():
+    """Serve the tiles of a random image, returns (base url, image)"""
+    rng = np.random.default_rng(1234)
+    image = rng.integers(0, 256, size=(150, 200, 3), dtype=np.uint8)
+    levels = _levels(image)
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # pylint: disable=invalid-name
+            if self.path == "/image=g":
+                self._send(_tile_info_xml(levels).encode(), "text/xml")
+                return
+            match = _TILE_RGX.match(self.path)
+            if match is None:
+                self.send_error(404)
+                return
+            tile_x, tile_y, zoom = map(int, match.groups())
+            tile = levels[zoom][tile_y * TILE_SIZE:(tile_y + 1) * TILE_SIZE,
+                                tile_x * TILE_SIZE:(tile_x + 1) * TILE_SIZE]
+            self._send(_png(np.ascontiguousarray(tile)), "image/png")
+
+        def _send(self, body, content_type):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):  # pylint: disable=arguments-differ
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/image", image
+    server.shutdown()
+    server.server_close()
+
+
+class _RecordingLimiter:
+    """Rate limiter that only records the urls it was asked for"""
+
+    def __init__(self):
+        self.urls = []
+        self._lock = threading.Lock()
+
+    def acquire(self, url=None):
+        with self._lock:
+            self.urls.append(url)
+
+    def record(self, url=None, status=None, **kwargs):
+        pass
+
+
+def test_fetch_full_resolution(tile_server):
+    base_url, image = tile_server
+    with SessionPool() as pool:
+        result = fetch_tiled_image(base_url, pool, tile_url_template=TEMPLATE)
+    np.testing.assert_array_equal(result, image)
+
+
+def test_fetch_zoom_level(tile_server):
+    base_url, image = tile_server
+    with SessionPool() as pool:
+        result = fetch_tiled_image(base_url, pool, tile_url_template=TEMPLATE,
+                                   zoom=0)
+    np.testing.assert_array_equal(result, _levels(image)[0])
+
+
+def test_fetch_missing_zoom_level(tile_server):
+    base_url, _image = tile_server
+    with SessionPool() as pool, pytest.raises(ValueError):
+        fetch_tiled_image(base_url, pool, tile_url_template=TEMPLATE, zoom=5)
+
+
+def test_fetch_with_rate_limiter(tile_server):
+    base_url, _image = tile_server
+    limiter = _RecordingLimiter()
+    with SessionPool() as pool:
+        fetch_tiled_image(base_url, pool, tile_url_template=TEMPLATE,
+                          rate_limiter=limiter)
+    # Tile info + 4x3 tiles.
+    assert len(limiter.urls) == 13
+    assert limiter.urls[0] == base_url + "=g"
+
+
+def test_parse_invalid_tile_info():
+    with pytest.raises(ValueError):
+        parse_tile_info("<html>not tiles</html>")
+    with pytest.raises(ValueError):
+        parse_tile_info('<TileInfo tile_width="256" tile_height="256"/>')
+
@@ -0,0 +1,170 @@
+"""Tests for resolving WikiArt links, against a local WikiArt server."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from artscraper import SessionPool, WikiArtScraper
+
+WIKIART_URL = "https://www.wikiart.org"
+LINK = WIKIART_URL + "/en/vincent-van-gogh/the-bedroom-1889"
+PAINTING = {"id": "57726d85edc2cb3880b48a3b", "title": "The Bedroom",
+            "artistUrl": "vincent-van-gogh", "url": "the-bedroom-1889",
+            "image": WIKIART_URL + "/images/the-bedroom.jpg"}
+
+
+class _WikiArtServer(ThreadingHTTPServer):
+    """Fake WikiArt API and artwork pages, with configurable failures"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        # Status codes of the search and the artwork page.
+        self.search_status = 200
+        self.search_delay = 0
+        self.page_status = 200
+        # Whether searching for artist + painting name finds the painting;
+        # searching for the artist always does (if the status is 200).
+        self.search_finds_painting = True
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=invalid-name
+        url = urlparse(self.path)
+        query = {key: value[0] for key, value in parse_qs(url.query).items()}
+        if url.path == "/en/api/2/PaintingSearch":
+            time.sleep(self.server.search_delay)
+            found = (self.server.search_finds_painting
+                     or query["term"] == "vincent van gogh")
+            self._send(self.server.search_status,
+                       {"data": [PAINTING] if found else [],
+                        "hasMore": False})
+        elif url.path == "/en/api/2/Painting":
+            if query["id"] == PAINTING["id"]:
+                self._send(200, PAINTING)
+            else:
+                self._send(404, {})
+        elif url.path == "/en/vincent-van-gogh/the-bedroom-1889":
+            body = f"<script>var paintingId = '{PAINTING['id']}';</script>"
+            self._send(self.server.page_status, body.encode(), "text/html")
+        else:
+            self._send(404, {})
+
+    def _send(self, status, body, content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class _LocalPool(SessionPool):
+    """Session pool that sends the requests to WikiArt to a local server"""
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+
+    def get(self, url, *args, **kwargs):
+        url = url.replace(WIKIART_URL, self.base_url)
+        return super().get(url, *args, **kwargs)
+
+
+@pytest.fixture(name="server")
+def fixture_server():
+    """Local WikiArt server"""
+    server = _WikiArtServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(name="make_scraper")
+def fixture_make_scraper(server, tmp_path, monkeypatch):
+    """Create WikiArt scrapers that use the local server"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".wiki_api").write_text("access\nsecret\n", encoding="utf-8")
+    (tmp_path / ".wiki_session").write_text("session", encoding="utf-8")
+    scrapers = []
+
+    def _make_scraper(**kwargs):
+        pool = _LocalPool(server.base_url)
+        scraper = WikiArtScraper(session_pool=pool, min_wait=0, **kwargs)
+        scrapers.append((scraper, pool))
+        return scraper
+
+    yield _make_scraper
+    for scraper, pool in scrapers:
+        scraper.close()
+        pool.close()
+
+
+@pytest.mark.parametrize("hedged", [False, True])
+def test_resolve(make_scraper, hedged):
+    scraper = make_scraper(hedged=hedged)
+    metadata = scraper.get_metadata(LINK)
+    assert metadata["id"] == PAINTING["id"]
+    assert metadata["link"] == LINK
+
+
+def test_hedged_uses_fastest(server, make_scraper):
+    server.search_delay = 2
+    scraper = make_scraper(hedged=True)
+    start = time.monotonic()
+    metadata = scraper.get_metadata(LINK)
+    assert metadata["id"] == PAINTING["id"]
+    assert time.monotonic() - start < 1.5
+    assert scraper.strategy_stats.stats["scrape"] == {"successes": 1,
+                                                      "attempts": 1}
+
+
+@pytest.mark.parametrize("hedged", [False, True])
+@pytest.mark.parametrize("page_status", [404, 410, 503])
+def test_page_error_falls_back(server, make_scraper, hedged, page_status):
+    # The scrape fails first, and mustn't stop the search.
+    server.page_status = page_status
+    server.search_delay = 0.3
+    scraper = make_scraper(hedged=hedged)
+    assert scraper.get_metadata(LINK)["id"] == PAINTING["id"]
+
+
+@pytest.mark.parametrize("hedged", [False, True])
+def test_falls_back_to_artist(server, make_scraper, hedged):
+    server.search_finds_painting = False
+    server.page_status = 404
+    scraper = make_scraper(hedged=hedged)
+    assert scraper.get_metadata(LINK)["id"] == PAINTING["id"]
+
+
+@pytest.mark.parametrize("hedged", [False, True])
+def test_painting_not_found(server, make_scraper, hedged):
+    server.search_finds_painting = False
+    server.page_status = 404
+    scraper = make_scraper(hedged=hedged)
+    with pytest.raises(ValueError):
+        scraper.get_metadata(WIKIART_URL + "/en/vincent-van-gogh/unknown")
+
+
+@pytest.mark.parametrize("hedged", [False, True])
+def test_server_error_is_raised(server, make_scraper, hedged):
+    # Not finding the painting because the server fails isn't a ValueError.
+    server.search_status = 503
+    server.page_status = 404
+    scraper = make_scraper(hedged=hedged)
+    with pytest.raises(requests.HTTPError):
+        scraper.get_metadata(LINK)